@@ -0,0 +1,24 @@
+"""
+JSON renderer backed by orjson when it is installed
+Falls back to Django REST framework's stdlib JSON renderer otherwise
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class ORJSONRenderer(JSONRenderer):
+    """Render API responses with orjson, which encodes several times faster"""
+    
+    # Handles the types orjson does not (lazy strings, Decimal, querysets, ...)
+    encoder = JSONEncoder()
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Indented output is only asked for when debugging, keep DRF's formatting there
+        if not ORJSON_AVAILABLE or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_NON_STR_KEYS)
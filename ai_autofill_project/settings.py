@@ -66,9 +66,31 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse each worker's connection across requests instead of reconnecting every time
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Cache - in-process memory cache for short-lived lookups such as Ollama status
+# Chat history, fill-all job status and cached LLM results live in the default
+# cache. Local memory is per process, so when running several workers (e.g.
+# gunicorn -w 4) set REDIS_URL (needs `pip install redis`) to share them
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ai-autofill',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,10 +140,56 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Uses orjson when installed (pip install orjson), stdlib json otherwise
+        'ai_autofill_project.renderers.ORJSONRenderer',
     ],
 }
 
+# Ollama settings
+OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL', 'http://localhost:11434')
+# Model to preload at startup; empty uses the OllamaClient default.
+# Prefer a Q4_K_M quantized tag (e.g. llama3:8b-instruct-q4_K_M) for lower memory bandwidth.
+OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', '')
+# Warm the model up when Django starts. Off by default so management commands
+# and tests never contact Ollama; set OLLAMA_PRELOAD=true where the server runs
+# (start_django.py does)
+OLLAMA_PRELOAD = os.environ.get('OLLAMA_PRELOAD', 'false').lower() == 'true'
+# How long Ollama keeps the model loaded after each request ("30m", "1h", or -1 for forever)
+OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')
+if OLLAMA_KEEP_ALIVE.lstrip('-').isdigit():
+    OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)
+# Characters of a document's extracted text included in LLM prompts (head and tail
+# are kept); lower it to cut prompt prefill time, 0 leaves the text out entirely
+PROMPT_TEXT_MAX_CHARS = int(os.environ.get('PROMPT_TEXT_MAX_CHARS', '4000'))
+
+# Worker processes that extract PDF layouts for uploads, so concurrent uploads use
+# separate cores; 0 runs extraction in the request thread
+DOCUMENT_PROCESS_WORKERS = int(os.environ.get('DOCUMENT_PROCESS_WORKERS', '2'))
+
+# Parsed documents each process keeps in memory; the least recently used are
+# dropped beyond this and reloaded from MEDIA_ROOT/documents when next needed
+DOCUMENT_CACHE_SIZE = int(os.environ.get('DOCUMENT_CACHE_SIZE', '256'))
+
+# Expose the universal document processor API (upload, training, training-data
+# import and fill endpoints, open to any client) under universal/. Off unless
+# ENABLE_UNIVERSAL_PROCESSOR=true; its routes and views are not loaded otherwise
+ENABLE_UNIVERSAL_PROCESSOR = os.environ.get('ENABLE_UNIVERSAL_PROCESSOR', 'false').lower() == 'true'
+
+# Logging: per-field debug output is off unless DJANGO_LOG_LEVEL=DEBUG
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+    },
+}
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -1,8 +1,35 @@
+import logging
+import threading
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+def warmup_ollama():
+    """Load the default model into Ollama and keep it resident"""
+    try:
+        import requests
+        from .views import _ollama_model
+        
+        model = _ollama_model()
+        # An empty prompt only loads the model; keep_alive keeps it loaded
+        requests.post(
+            f"{settings.OLLAMA_BASE_URL}/api/generate",
+            json={'model': model, 'prompt': '', 'keep_alive': settings.OLLAMA_KEEP_ALIVE, 'stream': False},
+            timeout=300
+        )
+        logger.info("Ollama model %s preloaded", model)
+    except Exception as e:
+        logger.warning("Ollama warmup skipped: %s", e)
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+    
+    def ready(self):
+        # Preload in the background so startup is never blocked on Ollama
+        if getattr(settings, 'OLLAMA_PRELOAD', False):
+            threading.Thread(target=warmup_ollama, daemon=True).start()
 
 
 
@@ -0,0 +1,51 @@
+"""
+Chat history storage backed by Django's cache framework
+Keeps conversation history shared between workers and expires idle sessions.
+History is only shared between processes when the default cache is shared
+between them (set REDIS_URL, see settings.CACHES); the local-memory fallback
+keeps a separate history in each process.
+"""
+from django.core.cache import cache
+
+# Idle chat sessions are dropped after this many seconds; each message also
+# expires this long after it was added
+CHAT_HISTORY_TTL = 24 * 60 * 60
+
+def _count_key(doc_id):
+    """Cache key counting the messages stored for a document"""
+    return f'chat:{doc_id}:count'
+
+def _message_key(doc_id, index):
+    """Cache key holding one message of a document's history"""
+    return f'chat:{doc_id}:message:{index}'
+
+def append_message(doc_id, message):
+    """Append a message to the chat history of a document"""
+    # One key per message, numbered by a counter. add() only
+    # creates a missing counter and incr() is atomic in the locmem, Redis and
+    # memcached backends, so concurrent appends from threads or workers each
+    # get their own slot and nothing re-reads the whole history
+    count_key = _count_key(doc_id)
+    cache.add(count_key, 0, CHAT_HISTORY_TTL)
+    try:
+        index = cache.incr(count_key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        cache.add(count_key, 0, CHAT_HISTORY_TTL)
+        index = cache.incr(count_key)
+    cache.set(_message_key(doc_id, index), message, CHAT_HISTORY_TTL)
+    cache.touch(count_key, CHAT_HISTORY_TTL)
+
+def get_messages(doc_id, limit=None):
+    """Return the chat history of a document, or None if there is no session.
+    
+    When limit is given only the newest ``limit`` messages are returned.
+    """
+    count = cache.get(_count_key(doc_id))
+    if count is None:
+        return None
+    start = max(count - limit, 0) + 1 if limit else 1
+    keys = [_message_key(doc_id, index) for index in range(start, count + 1)]
+    # A slot can be empty while its append is in flight, or once that message expired
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
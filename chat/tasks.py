@@ -0,0 +1,136 @@
+"""
+Background jobs for long-running chat actions
+Runs fill-all requests and chat field extraction off the request thread
+"""
+import copy
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.core.cache import cache
+from .chat_history_store import append_message
+
+logger = logging.getLogger(__name__)
+
+# Finished job results are kept for this many seconds
+FILL_JOB_TTL = 60 * 60
+
+# One worker: the Sejda step drives a desktop UI that jobs cannot share
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fill-all')
+
+# Field extraction after chat replies; kept apart so it never queues behind fill-all jobs
+_extract_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='extract-fields')
+
+def _job_key(job_id):
+    """Cache key holding the status of a fill-all job"""
+    return f'chat:fill-job:{job_id}'
+
+def _set_job(job):
+    """Store the current state of a job"""
+    cache.set(_job_key(job['job_id']), job, FILL_JOB_TTL)
+
+def submit_fill_all_fields(doc_id, overwrite=False):
+    """Queue a fill-all job for a document and return its job id"""
+    job = {
+        'job_id': str(uuid.uuid4()),
+        'doc_id': str(doc_id),
+        'status': 'pending'
+    }
+    _set_job(job)
+    _executor.submit(_run_fill_all_fields, job, overwrite)
+    return job['job_id']
+
+def _run_fill_all_fields(job, overwrite):
+    """Run a queued fill-all job and record its result or error"""
+    from .views import fill_document_fields
+
+    _set_job({**job, 'status': 'running'})
+    try:
+        result = fill_document_fields(job['doc_id'], overwrite)
+        _set_job({**job, 'status': 'done', 'result': result})
+    except Exception as e:
+        logger.exception("Fill-all job %s failed", job['job_id'])
+        _set_job({**job, 'status': 'failed', 'error': str(e)})
+
+def get_fill_job(job_id):
+    """Return the status of a fill-all job, or None if it is unknown or expired"""
+    return cache.get(_job_key(job_id))
+
+def submit_extract_fields(doc_id, message, response, document):
+    """Extract and fill fields from a chat exchange in the background"""
+    from documents.views import persistable_document
+
+    # The worker fills a private copy; the cached document stays with the request threads
+    _extract_executor.submit(_run_extract_fields, str(doc_id), message, response,
+                             copy.deepcopy(persistable_document(document)))
+
+def apply_filled_fields(doc_id, filled_fields):
+    """Copy filled fields into the current stored document and save it.
+    
+    The document is reloaded under its lock, so edits made while the fields
+    were being extracted are kept; fields that were removed or have been
+    given content in the meantime are left alone. Returns the fields applied.
+    """
+    from documents.views import document_lock, get_document_field, get_stored_document, save_document
+
+    with document_lock(doc_id):
+        document = get_stored_document(doc_id)
+        if not document:
+            return []
+        applied = []
+        for filled in filled_fields:
+            field = get_document_field(document, filled['id'])
+            if field is None or field.get('user_content'):
+                continue
+            field['user_content'] = filled['content']
+            field['ai_suggestion'] = filled['content']
+            field['ai_enhanced'] = True
+            applied.append(filled)
+        if applied:
+            save_document(doc_id, document)
+        return applied
+
+def apply_ai_suggestions(doc_id, filled_fields, sejda_filled_pdf=None):
+    """Store fill-all suggestions on the current stored document and save it.
+    
+    Like apply_filled_fields the document is reloaded under its lock, so
+    edits made while the suggestions were generated are kept; suggestions
+    go to ai_content/ai_suggestion and never replace user_content.
+    """
+    from documents.views import document_lock, get_document_field, get_stored_document, save_document
+
+    with document_lock(doc_id):
+        document = get_stored_document(doc_id)
+        if not document:
+            return
+        for filled in filled_fields:
+            field = get_document_field(document, filled['id'])
+            if field is None:
+                continue
+            field['ai_content'] = filled['content']
+            field['ai_suggestion'] = filled['content']
+            field['ai_enhanced'] = True
+        if sejda_filled_pdf:
+            document['sejda_filled_pdf'] = sejda_filled_pdf
+        save_document(doc_id, document)
+
+def _run_extract_fields(doc_id, message, response, document):
+    """Run field extraction and post any filled fields to the chat history"""
+    from .views import extract_and_fill_fields
+
+    try:
+        filled_fields = extract_and_fill_fields(message, response, document)
+        if filled_fields:
+            filled_fields = apply_filled_fields(doc_id, filled_fields)
+    except Exception:
+        logger.exception("Field extraction for %s failed", doc_id)
+        return
+
+    # Delivered as a follow-up bot message so clients polling history pick it up
+    if filled_fields:
+        append_message(doc_id, {
+            'message_type': 'bot',
+            'content': '\n'.join(f'✅ Filled {field["type"]} field: "{field["content"]}"' for field in filled_fields),
+            'timestamp': datetime.now().isoformat(),
+            'filled_fields': filled_fields
+        })
@@ -0,0 +1,80 @@
+import tempfile
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from .chat_history_store import append_message, get_messages
+from .tasks import apply_ai_suggestions
+from .views import _scan_field_patterns
+
+
+class ScanFieldPatternsTests(SimpleTestCase):
+    """Each field type is matched on its own, even inside another type's match"""
+
+    def test_phone_inside_address_line(self):
+        matches = _scan_field_patterns('My address is 12 Main St, phone 555-123-4567', '')
+        self.assertEqual(matches['address'], '12 Main St, phone 555-123-4567')
+        self.assertEqual(matches['phone'], '555-123-4567')
+
+    def test_email_inside_address_line(self):
+        matches = _scan_field_patterns('address: 1 Elm St, email bob@x.com', '')
+        self.assertEqual(matches['email'], 'bob@x.com')
+
+    def test_message_beats_response(self):
+        matches = _scan_field_patterns('email me at me@home.org', 'or write to bot@x.com')
+        self.assertEqual(matches['email'], 'me@home.org')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ChatHistoryStoreTests(SimpleTestCase):
+    """Appends and reads through the per-message cache keys"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown_document_has_no_session(self):
+        self.assertIsNone(get_messages('missing'))
+
+    def test_append_and_read_in_order(self):
+        for index in range(5):
+            append_message('doc', {'content': index})
+        self.assertEqual([message['content'] for message in get_messages('doc')], [0, 1, 2, 3, 4])
+        self.assertEqual([message['content'] for message in get_messages('doc', limit=2)], [3, 4])
+
+    def test_concurrent_appends_keep_every_message(self):
+        def append_many(worker):
+            for index in range(50):
+                append_message('doc', {'content': (worker, index)})
+
+        threads = [threading.Thread(target=append_many, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(get_messages('doc')), 200)
+
+
+class ApplyAiSuggestionsTests(SimpleTestCase):
+    """Fill-all results are merged into the stored document, not written over it"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_keeps_edits_saved_while_generating(self):
+        from documents.views import documents_storage, get_stored_document, save_document
+
+        save_document('doc', {'fields': [{'id': 'a', 'user_content': ''}, {'id': 'b', 'user_content': ''}]})
+        # Another worker saves an edit after the suggestions were generated from the old copy
+        save_document('doc', {'fields': [{'id': 'a', 'user_content': ''}, {'id': 'b', 'user_content': 'edited'}]})
+        apply_ai_suggestions('doc', [{'id': 'a', 'content': 'x'}, {'id': 'gone', 'content': 'y'}], sejda_filled_pdf='out.pdf')
+
+        documents_storage.pop('doc')
+        document = get_stored_document('doc')
+        self.assertEqual(document['fields'][0]['ai_content'], 'x')
+        self.assertEqual(document['fields'][1]['user_content'], 'edited')
+        self.assertEqual(document['sejda_filled_pdf'], 'out.pdf')
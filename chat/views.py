@@ -3,10 +3,100 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.http import Http404
+from django.conf import settings
+from django.core.cache import cache
 from ollama_integration import OllamaChatBot, OllamaClient
 from datetime import datetime
+from functools import lru_cache
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
 import re
 from intelligent_field_filler import IntelligentFieldFiller
+from sejda_direct_fill import PYWINAUTO_AVAILABLE, SejdaDirectFill
+from .chat_history_store import append_message, get_messages
+from .tasks import apply_ai_suggestions, get_fill_job, submit_extract_fields, submit_fill_all_fields
+
+logger = logging.getLogger(__name__)
+
+# Extraction patterns for common field types, compiled once at import.
+# Each pattern captures the field value in group 1.
+_FIELD_PATTERNS = {field_type: [re.compile(pattern, re.IGNORECASE) for pattern in patterns] for field_type, patterns in {
+    'email': [
+        r'([\w.+-]+@[\w-]+\.[\w.-]*\w)',
+    ],
+    'phone': [
+        r'(?:phone|tel|telephone|mobile)(?:\s+number)?\s*(?:is|:)?\s*(\+?\d[\d\s().-]{5,}\d)',
+        r'(\+?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4})',
+    ],
+    'name': [
+        r'my name is\s+((?-i:[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2}))',
+        r'name\s*:\s*((?-i:[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2}))',
+    ],
+    'date': [
+        r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(\d{4}-\d{2}-\d{2})',
+    ],
+    'age': [
+        r'(\d{1,3})\s+years?\s+old',
+        r'age\s*(?:is|:)\s*(\d{1,3})',
+    ],
+    'address': [
+        r'address\s*(?:is|:)\s*([^\n]+)',
+        r'i live at\s+([^\n]+)',
+    ],
+}.items()}
+
+# Shortest text any field pattern can match ("a@b.c"); shorter texts are not scanned
+_MIN_PATTERN_MATCH_LEN = 5
+
+# Every field pattern needs one of these cues, so texts without any skip the full scan
+_FIELD_CUE_RE = re.compile(r'[@\d]|name|address|live at', re.IGNORECASE)
+
+# Outermost {...} span of a batched field reply
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Cache key and lifetime (seconds) for the Ollama status payload polled by the frontend
+OLLAMA_STATUS_CACHE_KEY = 'ollama_status'
+OLLAMA_STATUS_CACHE_TTL = 5
+
+# Lifetime (seconds) of cached LLM suggestions for an identical prompt
+LLM_RESPONSE_CACHE_TTL = 10 * 60
+
+# Upper bound on concurrent per-field generations; keep in line with the Ollama server's OLLAMA_NUM_PARALLEL
+OLLAMA_NUM_PARALLEL = int(os.environ.get('OLLAMA_NUM_PARALLEL', '4'))
+
+@lru_cache(maxsize=1)
+def _get_chatbot():
+    """Return the shared OllamaChatBot so every request reuses one instance"""
+    return OllamaChatBot()
+
+@lru_cache(maxsize=1)
+def _get_ollama_client():
+    """Return the shared OllamaClient so every request reuses one instance"""
+    return OllamaClient()
+
+@lru_cache(maxsize=1)
+def _get_field_filler():
+    """Return the shared IntelligentFieldFiller so every request reuses one instance"""
+    return IntelligentFieldFiller()
+
+def _ollama_model():
+    """Name of the Ollama model requests are sent to"""
+    return settings.OLLAMA_MODEL or _get_ollama_client().model
+
+def _llm_cache_key(*parts):
+    """Cache key for an LLM result, hashed from the model and everything in the prompt"""
+    digest = hashlib.blake2b(json.dumps([_ollama_model(), *parts], sort_keys=True, default=str).encode(), digest_size=16)
+    return f'llm:{digest.hexdigest()}'
+
+@lru_cache(maxsize=1)
+def _get_sejda_processor():
+    """Return the shared SejdaDirectFill, or None when pywinauto is not installed"""
+    return SejdaDirectFill() if PYWINAUTO_AVAILABLE else None
 
 @api_view(['POST'])
 def general_chat(request):
@@ -15,7 +105,7 @@ def general_chat(request):
         message = request.data.get('message', '')
         
         # Process message with chatbot (no document context)
-        chatbot = OllamaChatBot()
+        chatbot = _get_chatbot()
         response = chatbot.process_message(message, {})
         
         return Response({
@@ -31,58 +121,53 @@ def chat_with_bot(request, doc_id):
     """Handle chat messages"""
     try:
         message = request.data.get('message', '')
+        doc_key = str(doc_id)
         
-        # Import documents_storage from documents.views
-        from documents.views import documents_storage, chat_sessions
+        from documents.views import get_document_context, get_stored_document
         
-        # Get document from memory
-        document = documents_storage.get(str(doc_id))
+        # Get document from storage
+        document = get_stored_document(doc_key)
         if not document:
             return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get or create chat session
-        if str(doc_id) not in chat_sessions:
-            chat_sessions[str(doc_id)] = {
-                'messages': [],
-                'created_at': datetime.now().isoformat()
-            }
-        
         # Add user message
         user_message = {
             'message_type': 'user',
             'content': message,
             'timestamp': datetime.now().isoformat()
         }
-        chat_sessions[str(doc_id)]['messages'].append(user_message)
+        append_message(doc_key, user_message)
         
         # Get document context
-        doc_context = {
-            'document_type': 'form',
-            'total_blanks': document['total_blanks'],
-            'field_types': [field['field_type'] for field in document['fields']],
-            'extracted_text': document['extracted_text']
-        }
+        doc_context = get_document_context(document)
         
         # Process message with chatbot
-        chatbot = OllamaChatBot()
+        chatbot = _get_chatbot()
         response = chatbot.process_message(message, doc_context)
         
-        # Try to extract and fill fields from the conversation
-        filled_fields = extract_and_fill_fields(message, response, document)
-        
         # Add bot message
         bot_message = {
             'message_type': 'bot',
             'content': response,
-            'timestamp': datetime.now().isoformat(),
-            'filled_fields': filled_fields
+            'timestamp': datetime.now().isoformat()
         }
-        chat_sessions[str(doc_id)]['messages'].append(bot_message)
+        append_message(doc_key, bot_message)
+        
+        # Extract and fill fields from the conversation in the background;
+        # filled fields arrive as a follow-up message in the chat history
+        submit_extract_fields(doc_key, message, response, document)
+        
+        # The whole conversation, or with `since` (an ISO timestamp, as for
+        # get_chat_history) only the messages after it, e.g. just this turn
+        messages = get_messages(doc_key) or []
+        since = request.query_params.get('since')
+        if since:
+            messages = [message for message in messages if message['timestamp'] > since]
         
         return Response({
             'success': True,
             'response': response,
-            'messages': chat_sessions[str(doc_id)]['messages']
+            'messages': messages
         })
         
     except Exception as e:
@@ -90,31 +175,59 @@ def chat_with_bot(request, doc_id):
 
 @api_view(['GET'])
 def get_chat_history(request, doc_id):
-    """Get chat history for a document"""
+    """Get chat history for a document
+    
+    Fields filled from a chat exchange show up as a later bot message with a
+    ``filled_fields`` list once the background extraction has finished.
+    Optional query parameters let clients fetch only what they are missing:
+    ``since`` returns messages with a timestamp after the given ISO timestamp,
+    ``limit`` returns at most that many of the newest messages.
+    """
     try:
-        from documents.views import chat_sessions
-        
-        if str(doc_id) not in chat_sessions:
+        since = request.query_params.get('since')
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit <= 0:
+                return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        messages = get_messages(str(doc_id), limit)
+        if messages is None:
             return Response({'error': 'Chat session not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response(chat_sessions[str(doc_id)]['messages'])
+        # History is chronological, so the messages after `since` are a suffix of the list
+        if since:
+            messages = [message for message in messages if message['timestamp'] > since]
+        
+        return Response(messages)
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['GET'])
-def ollama_status(request):
-    """Check Ollama service status"""
-    try:
-        ollama = OllamaClient()
+def get_ollama_status():
+    """Return whether Ollama is running and its models, cached for OLLAMA_STATUS_CACHE_TTL seconds"""
+    data = cache.get(OLLAMA_STATUS_CACHE_KEY)
+    if data is None:
+        ollama = _get_ollama_client()
         is_running = ollama.is_ollama_running()
         models = ollama.list_models() if is_running else []
         
-        return Response({
+        data = {
             'running': is_running,
             'models': models,
             'default_model': ollama.model
-        })
+        }
+        cache.set(OLLAMA_STATUS_CACHE_KEY, data, OLLAMA_STATUS_CACHE_TTL)
+    return data
+
+@api_view(['GET'])
+def ollama_status(request):
+    """Check Ollama service status"""
+    try:
+        return Response(get_ollama_status())
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -124,8 +237,11 @@ def pull_ollama_model(request):
     try:
         model_name = request.data.get('model_name', 'llama2')
         
-        ollama = OllamaClient()
+        ollama = _get_ollama_client()
         success = ollama.pull_model(model_name)
+        if success:
+            # Make the new model show up in the next status check
+            cache.delete(OLLAMA_STATUS_CACHE_KEY)
         
         return Response({
             'success': success,
@@ -142,38 +258,35 @@ def suggest_field_content(request, doc_id):
         field_id = request.data.get('field_id')
         user_input = request.data.get('user_input', '')
         
-        from documents.views import documents_storage
+        from documents.views import get_document_context, get_document_field, get_stored_document
         
-        document = documents_storage.get(str(doc_id))
+        document = get_stored_document(doc_id)
         if not document:
             return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Find the field
-        field = None
-        for f in document['fields']:
-            if f['id'] == field_id:
-                field = f
-                break
+        field = get_document_field(document, field_id)
         
         if not field:
             return Response({'error': 'Field not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Use intelligent field filler for better suggestions
-        intelligent_filler = IntelligentFieldFiller()
+        intelligent_filler = _get_field_filler()
         
         # Get document context
-        doc_context = {
-            'document_type': 'form',
-            'total_blanks': document['total_blanks'],
-            'field_types': [f['field_type'] for f in document['fields']],
-            'extracted_text': document['extracted_text']
-        }
-        
-        # Get suggestions based on user input and field context
-        suggestion = intelligent_filler.suggest_field_content(field, user_input, doc_context)
-        
-        # Also get alternative suggestions
-        alternative_suggestions = intelligent_filler.get_field_suggestions(field, doc_context)
+        doc_context = get_document_context(document)
+        
+        # Get suggestions based on user input and field context, together with
+        # alternative suggestions; both Ollama calls run concurrently.
+        # Identical requests (e.g. UI retries) are answered from the cache.
+        cache_key = _llm_cache_key('suggest', field['field_type'], field['context'], user_input, doc_context)
+        suggestions = cache.get(cache_key)
+        if suggestions is None:
+            suggestions = asyncio.run(
+                _asuggest_field_content(intelligent_filler, field, user_input, doc_context)
+            )
+            cache.set(cache_key, suggestions, LLM_RESPONSE_CACHE_TTL)
+        suggestion, alternative_suggestions = suggestions
         
         return Response({
             'success': True,
@@ -189,155 +302,304 @@ def suggest_field_content(request, doc_id):
 
 @api_view(['POST'])
 def fill_all_fields(request, doc_id):
-    """Fill all empty fields with AI suggestions - NOW WITH CLEAN SEJDA!"""
+    """Fill all empty fields with AI suggestions - NOW WITH CLEAN SEJDA!
+    
+    Returns the filled fields once done. With ``background`` set (in the
+    query string or body) the work is queued instead and the request returns
+    immediately with 202 and a job id; poll fill_all_fields_status for
+    progress and the result.
+    Per-field fallback generations run concurrently; set the OLLAMA_NUM_PARALLEL
+    environment variable (default 4) to match the Ollama server's parallelism.
+    """
     try:
-        # Get document from persistent storage
-        from documents.views import get_stored_document, save_document
-        document = get_stored_document(doc_id)
-        if not document:
+        from documents.views import get_stored_document
+        if not get_stored_document(doc_id):
             return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if we should use CLEAN Sejda workflow
-        from sejda_direct_fill import SejdaDirectFill
-        try:
-            import pywinauto
-            PYWINAUTO_AVAILABLE = True
-        except:
-            PYWINAUTO_AVAILABLE = False
-        
-        use_sejda_clean = False
-        sejda_processor = None
-        
-        if document.get('file_path', '').lower().endswith('.pdf'):
-            sejda_processor = SejdaDirectFill()
-            if sejda_processor.sejda_path and PYWINAUTO_AVAILABLE:
-                use_sejda_clean = True
-                print("\n" + "="*60)
-                print("🎯 CLEAN SEJDA WORKFLOW ACTIVATED!")
-                print("="*60)
-        
         # Overwrite flag: when true, fill even fields that already have content
         try:
             overwrite = bool(request.data.get('overwrite', False))
         except Exception:
             overwrite = False
-
-        # Get document context
-        doc_context = {
-            'document_type': 'form',
-            'total_blanks': document['total_blanks'],
-            'field_types': [field['field_type'] for field in document['fields']],
-            'extracted_text': document['extracted_text']
-        }
         
-        # Use intelligent field filler for better content generation
-        intelligent_filler = IntelligentFieldFiller()
-        filled_fields = []
+        if not (request.query_params.get('background') or request.data.get('background')):
+            return Response(fill_document_fields(doc_id, overwrite))
         
-        for field in document['fields']:
-            if overwrite or not field.get('user_content'):
-                # Generate intelligent content based on field type and context
-                suggested_content = intelligent_filler.generate_field_content(field, doc_context)
-                
-                filled_fields.append({
-                    'id': field.get('id'),
-                    'content': suggested_content,
-                    'type': field.get('field_type')
-                })
-                
-                # Update the field in the document - store AI content separately
-                field['ai_content'] = suggested_content
-                field['ai_suggestion'] = suggested_content
-                field['ai_enhanced'] = True
-                print(f"AI filled field {field.get('id')}: '{suggested_content}'")
-        
-        # Save the document with AI content to persistent storage
-        save_document(document)
-        
-        # If CLEAN Sejda workflow is available, trigger it NOW!
-        if use_sejda_clean and sejda_processor:
-            print("\n🚀 Triggering CLEAN Sejda workflow...")
-            
-            # Prepare AI data for Sejda
-            ai_data_for_sejda = {}
-            for field in document['fields']:
-                ai_value = field.get('ai_content') or field.get('ai_suggestion', '')
-                if ai_value:
-                    # Use field ID as key
-                    ai_data_for_sejda[field['id']] = ai_value
-            
-            # Get file paths
-            input_pdf = document.get('file_path', '')
-            output_pdf = input_pdf.replace('uploads/', 'processed/sejda_filled_')
-            
-            # Make sure paths are absolute
-            from django.conf import settings
-            import os
-            input_pdf_full = os.path.join(settings.MEDIA_ROOT, input_pdf) if not os.path.isabs(input_pdf) else input_pdf
-            output_pdf_full = os.path.join(settings.MEDIA_ROOT, output_pdf)
-            
-            print(f"   📂 Input PDF: {input_pdf_full}")
-            print(f"   💾 Output PDF: {output_pdf_full}")
-            print(f"   🤖 AI data: {len(ai_data_for_sejda)} fields")
-            
-            # Execute CLEAN Sejda workflow
-            result = sejda_processor.process_pdf_clean(input_pdf_full, ai_data_for_sejda, output_pdf_full)
-            
-            if result['success']:
-                print("✅ CLEAN Sejda workflow completed!")
-                print(f"   📄 Filled PDF saved: {output_pdf_full}")
-                
-                # Update document with Sejda-filled PDF path
-                document['sejda_filled_pdf'] = output_pdf
-                save_document(document)
-                
-                return Response({
-                    'success': True,
-                    'filled_fields': filled_fields,
-                    'sejda_filled': True,
-                    'sejda_pdf_url': f"/media/{output_pdf}",
-                    'message': f'✅ Filled {len(filled_fields)} fields with AI and saved via Sejda!'
-                })
-            else:
-                print(f"⚠️  Sejda workflow failed: {result.get('error')}")
-                print("   → Returning AI-filled data without Sejda")
+        job_id = submit_fill_all_fields(doc_id, overwrite)
         
         return Response({
             'success': True,
-            'filled_fields': filled_fields,
-            'message': f'Filled {len(filled_fields)} fields with AI suggestions'
-        })
+            'job_id': job_id,
+            'status': 'pending'
+        }, status=status.HTTP_202_ACCEPTED)
         
+    except LookupError:
+        return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def fill_all_fields_status(request, doc_id, job_id):
+    """Get the status, and once done the result, of a fill-all job"""
+    try:
+        job = get_fill_job(str(job_id))
+        if not job or job['doc_id'] != str(doc_id):
+            return Response({'error': 'Fill job not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(job)
+        
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def fill_document_fields(doc_id, overwrite=False):
+    """Fill all empty fields of a document with AI suggestions and return the result"""
+    # Get document from persistent storage
+    from documents.views import get_document_context, get_stored_document, persistable_document
+    document = get_stored_document(doc_id)
+    if not document:
+        raise LookupError('Document not found')
+    
+    # Fill a private copy; the results are merged into the stored document at the end
+    document = copy.deepcopy(persistable_document(document))
+    
+    # Check if we should use CLEAN Sejda workflow
+    use_sejda_clean = False
+    sejda_processor = None
+    
+    if document.get('file_path', '').lower().endswith('.pdf'):
+        sejda_processor = _get_sejda_processor()
+        if sejda_processor and sejda_processor.sejda_path:
+            use_sejda_clean = True
+            print("\n" + "="*60)
+            print("🎯 CLEAN SEJDA WORKFLOW ACTIVATED!")
+            print("="*60)
+    
+    # Get document context
+    doc_context = get_document_context(document)
+    
+    # Use intelligent field filler for better content generation
+    intelligent_filler = _get_field_filler()
+    
+    # Generate content for every pending field with one batched Ollama call
+    pending_fields = [field for field in document['fields'] if overwrite or not field.get('user_content')]
+    generated_contents = generate_fields_content(pending_fields, doc_context, intelligent_filler)
+    
+    filled_fields = [None] * len(pending_fields)
+    for index, (field, suggested_content) in enumerate(zip(pending_fields, generated_contents)):
+        field_id = field.get('id')
+        filled_fields[index] = {
+            'id': field_id,
+            'content': suggested_content,
+            'type': field.get('field_type')
+        }
+        
+        # Update the field in the document - store AI content separately
+        field['ai_content'] = suggested_content
+        field['ai_suggestion'] = suggested_content
+        field['ai_enhanced'] = True
+        logger.debug("AI filled field %s: %r", field_id, suggested_content)
+    
+    # If CLEAN Sejda workflow is available, trigger it NOW!
+    if use_sejda_clean and sejda_processor:
+        print("\n🚀 Triggering CLEAN Sejda workflow...")
+        
+        # Prepare AI data for Sejda
+        ai_data_for_sejda = {}
+        for field in document['fields']:
+            ai_value = field.get('ai_content') or field.get('ai_suggestion', '')
+            if ai_value:
+                # Use field ID as key
+                ai_data_for_sejda[field['id']] = ai_value
+        
+        # Get file paths
+        input_pdf = document.get('file_path', '')
+        output_pdf = input_pdf.replace('uploads/', 'processed/sejda_filled_')
+        
+        # Make sure paths are absolute
+        from django.conf import settings
+        import os
+        input_pdf_full = os.path.join(settings.MEDIA_ROOT, input_pdf) if not os.path.isabs(input_pdf) else input_pdf
+        output_pdf_full = os.path.join(settings.MEDIA_ROOT, output_pdf)
+        
+        print(f"   📂 Input PDF: {input_pdf_full}")
+        print(f"   💾 Output PDF: {output_pdf_full}")
+        print(f"   🤖 AI data: {len(ai_data_for_sejda)} fields")
+        
+        # Execute CLEAN Sejda workflow
+        result = sejda_processor.process_pdf_clean(input_pdf_full, ai_data_for_sejda, output_pdf_full)
+        
+        if result['success']:
+            print("✅ CLEAN Sejda workflow completed!")
+            print(f"   📄 Filled PDF saved: {output_pdf_full}")
+            
+            # Save the AI content and Sejda PDF path in one write
+            apply_ai_suggestions(doc_id, filled_fields, sejda_filled_pdf=output_pdf)
+            
+            return {
+                'success': True,
+                'filled_fields': filled_fields,
+                'sejda_filled': True,
+                'sejda_pdf_url': f"/media/{output_pdf}",
+                'message': f'✅ Filled {len(filled_fields)} fields with AI and saved via Sejda!'
+            }
+        else:
+            print(f"⚠️  Sejda workflow failed: {result.get('error')}")
+            print("   → Returning AI-filled data without Sejda")
+    
+    # Save the AI content to persistent storage
+    apply_ai_suggestions(doc_id, filled_fields)
+    
+    return {
+        'success': True,
+        'filled_fields': filled_fields,
+        'message': f'Filled {len(filled_fields)} fields with AI suggestions'
+    }
+
+async def _asuggest_field_content(intelligent_filler, field, user_input, doc_context):
+    """Return (suggestion, alternative suggestions) for a field from two concurrent calls"""
+    return await asyncio.gather(
+        asyncio.to_thread(intelligent_filler.suggest_field_content, field, user_input, doc_context),
+        asyncio.to_thread(intelligent_filler.get_field_suggestions, field, doc_context)
+    )
+
+def _build_batch_prompt(fields):
+    """Build a single prompt asking for content for every field as one JSON object"""
+    lines = [
+        "Suggest realistic content for each of the following form fields.",
+        "Reply with only a JSON object that maps each field id to its content.",
+        "",
+    ]
+    for field in fields:
+        lines.append(f"- {field.get('id')}: type={field.get('field_type', 'text')}, context={field.get('context', '')}")
+    return "\n".join(lines)
+
+def _parse_batch_response(response):
+    """Parse the field id -> content JSON object out of a batched chatbot response"""
+    match = _JSON_OBJECT_RE.search(response or '')
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(key): str(value).strip() for key, value in data.items() if value not in (None, '')}
+
+def generate_fields_content(fields, doc_context, intelligent_filler, fallback=None):
+    """Generate content for several fields with one Ollama round-trip.
+    
+    Returns a list of contents in the same order as ``fields``. Fields the
+    batched reply does not cover fall back to the intelligent filler, run
+    concurrently so the wait is the slowest field rather than their sum.
+    A field whose generation fails gets ``fallback`` when one is given;
+    otherwise the first such error is raised.
+    """
+    if not fields:
+        return []
+    
+    try:
+        response = _get_chatbot().process_message(_build_batch_prompt(fields), doc_context)
+        batched = _parse_batch_response(response)
+    except Exception as e:
+        logger.warning("Batched field generation failed, falling back to per-field generation: %s", e)
+        batched = {}
+    
+    contents = [batched.get(str(field.get('id'))) for field in fields]
+    missing = [index for index, content in enumerate(contents) if not content]
+    if missing:
+        generated = asyncio.run(_agenerate_fields_content([fields[index] for index in missing], doc_context, intelligent_filler))
+        for index, content in zip(missing, generated):
+            if isinstance(content, Exception):
+                if fallback is None:
+                    raise content
+                logger.warning("Failed to generate AI data for field %s: %s", fields[index].get('id'), content)
+                content = fallback
+            contents[index] = content
+    return contents
+
+async def _agenerate_fields_content(fields, doc_context, intelligent_filler):
+    """Generate per-field content concurrently, at most OLLAMA_NUM_PARALLEL at a time.
+    
+    A field whose generation raises gets the exception in its place.
+    """
+    semaphore = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+    
+    async def generate(field):
+        async with semaphore:
+            return await asyncio.to_thread(intelligent_filler.generate_field_content, field, doc_context)
+    
+    return await asyncio.gather(*(generate(field) for field in fields), return_exceptions=True)
+
+def _match_field_pattern(text, field_type):
+    """Return the first value captured by the precompiled patterns for a field type"""
+    for pattern in _FIELD_PATTERNS[field_type]:
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+    return None
+
+def _scan_field_patterns(message, response):
+    """Return {field_type: value} for every field type with a pattern match.
+    
+    A match in the message beats one in the response; within the same text the
+    earliest listed pattern wins, then the earliest position. Each field type
+    is searched on its own, so matches of different types may overlap.
+    """
+    matches = {}
+    # Cheap checks first: most chat texts are too short or lack every pattern's cue
+    texts = [text for text in (message, response)
+             if len(text) >= _MIN_PATTERN_MATCH_LEN and _FIELD_CUE_RE.search(text)]
+    if not texts:
+        return matches
+    for field_type in _FIELD_PATTERNS:
+        for text in texts:
+            value = _match_field_pattern(text, field_type)
+            if value:
+                matches[field_type] = value
+                break
+    return matches
+
 def extract_and_fill_fields(message, response, document):
     """Extract information from chat and fill relevant fields using intelligent filler"""
+    from documents.views import get_document_context
+    
     filled_fields = []
     
+    # Nothing to do once every field has content
+    empty_fields = [field for field in document['fields'] if not field['user_content']]
+    if not empty_fields:
+        return filled_fields
+    
     # Use intelligent field filler for better extraction
-    intelligent_filler = IntelligentFieldFiller()
+    intelligent_filler = _get_field_filler()
     
     # Get document context
-    doc_context = {
-        'document_type': 'form',
-        'total_blanks': document['total_blanks'],
-        'field_types': [field['field_type'] for field in document['fields']],
-        'extracted_text': document['extracted_text']
-    }
+    doc_context = get_document_context(document)
     
-    # Check each field in the document
-    for field in document['fields']:
-        # Skip if field already has content
-        if field['user_content']:
-            continue
-        
-        # Try to extract content from user message first
-        extracted_content = intelligent_filler._extract_content_from_input(message, field['field_type'])
-        
-        # If no content extracted from message, try AI response
-        if not extracted_content:
-            extracted_content = intelligent_filler._extract_content_from_input(response, field['field_type'])
+    # Filler extraction only depends on the field type, so run it once per type
+    filler_matches = {}
+    pattern_matches = None
+    
+    # Check each empty field in the document
+    for field in empty_fields:
+        field_type = field['field_type']
+        
+        # Let the intelligent filler extract from the user message first,
+        # and if that finds nothing, from the AI response
+        if field_type not in filler_matches:
+            filler_matches[field_type] = (
+                intelligent_filler._extract_content_from_input(message, field_type)
+                or intelligent_filler._extract_content_from_input(response, field_type)
+            )
+        extracted_content = filler_matches[field_type]
+        
+        # Only for types the filler found nothing for, fall back to the field
+        # patterns (user message first); both texts are scanned once, on first use
+        if not extracted_content and field_type in _FIELD_PATTERNS:
+            if pattern_matches is None:
+                pattern_matches = _scan_field_patterns(message, response)
+            extracted_content = pattern_matches.get(field_type)
         
         # If still no content, generate based on field type
         if not extracted_content:
@@ -345,7 +607,7 @@ def extract_and_fill_fields(message, response, document):
         
         if extracted_content:
             # Validate the content
-            if intelligent_filler.validate_field_content(extracted_content, field['field_type']):
+            if intelligent_filler.validate_field_content(extracted_content, field_type):
                 # Update the field
                 field['user_content'] = extracted_content
                 field['ai_suggestion'] = extracted_content
@@ -353,7 +615,7 @@ def extract_and_fill_fields(message, response, document):
                 
                 filled_fields.append({
                     'id': field['id'],
-                    'type': field['field_type'],
+                    'type': field_type,
                     'content': extracted_content
                 })
     
@@ -4,8 +4,9 @@ Check if Sejda PDF Desktop is installed and accessible
 """
 
 import subprocess
-import os
+import shutil
 from pathlib import Path
+from sejda_paths import first_existing_path, load_cached_sejda_path, save_cached_sejda_path
 
 def check_sejda_installation():
     """Check if Sejda Desktop CLI is installed"""
@@ -30,44 +31,55 @@ def check_sejda_installation():
         "/usr/bin/sejda-console",
     ]
     
+    # A location found by an earlier run skips the probes below
+    cached_path = load_cached_sejda_path()
+    if cached_path:
+        print(f"✅ Sejda Desktop CLI found (cached): {cached_path}")
+        return True
+    
     # Check if sejda-console is in PATH
     print("1. Checking if sejda-console is in PATH...")
-    try:
-        result = subprocess.run(['sejda-console', '--version'], 
-                              capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            print("   ✅ FOUND in PATH!")
-            print(f"   Version: {result.stdout.strip()}")
-            print()
-            print("🎉 Sejda Desktop CLI is ready to use!")
-            print("   Your PDFs will be processed OFFLINE with best accuracy.")
-            return True
-    except FileNotFoundError:
+    if not shutil.which('sejda-console'):
         print("   ❌ Not found in PATH")
-    except subprocess.TimeoutExpired:
-        print("   ⚠️  Command timed out")
-    except Exception as e:
-        print(f"   ⚠️  Error: {e}")
+    else:
+        try:
+            result = subprocess.run(['sejda-console', '--version'], 
+                                  capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                print("   ✅ FOUND in PATH!")
+                print(f"   Version: {result.stdout.strip()}")
+                print()
+                print("🎉 Sejda Desktop CLI is ready to use!")
+                print("   Your PDFs will be processed OFFLINE with best accuracy.")
+                save_cached_sejda_path('sejda-console')
+                return True
+        except FileNotFoundError:
+            print("   ❌ Not found in PATH")
+        except subprocess.TimeoutExpired:
+            print("   ⚠️  Command timed out")
+        except Exception as e:
+            print(f"   ⚠️  Error: {e}")
     
     print()
     print("2. Checking common installation paths...")
     
-    for path in common_paths:
-        if os.path.exists(path):
-            print(f"   ✅ FOUND: {path}")
-            try:
-                result = subprocess.run([path, '--version'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    print(f"   Version: {result.stdout.strip()}")
-                    print()
-                    print("🎉 Sejda Desktop CLI is installed!")
-                    print(f"   Path: {path}")
-                    print()
-                    print("   To make it accessible from anywhere, add it to your PATH.")
-                    return True
-            except Exception as e:
-                print(f"   ⚠️  Found but can't execute: {e}")
+    path = first_existing_path(common_paths)
+    if path:
+        print(f"   ✅ FOUND: {path}")
+        try:
+            result = subprocess.run([path, '--version'], 
+                                  capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                print(f"   Version: {result.stdout.strip()}")
+                print()
+                print("🎉 Sejda Desktop CLI is installed!")
+                print(f"   Path: {path}")
+                print()
+                print("   To make it accessible from anywhere, add it to your PATH.")
+                save_cached_sejda_path(path)
+                return True
+        except Exception as e:
+            print(f"   ⚠️  Found but can't execute: {e}")
     
     print("   ❌ Not found in common paths")
     print()
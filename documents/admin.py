@@ -13,10 +13,20 @@ class DocumentAdmin(admin.ModelAdmin):
     search_fields = ['filename', 'extracted_text']
     readonly_fields = ['id', 'uploaded_at']
     inlines = [DocumentFieldInline]
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # The changelist never shows extracted_text, so don't load it for every row
+        match = request.resolver_match
+        if match and match.url_name and match.url_name.endswith('_changelist'):
+            queryset = queryset.defer('extracted_text')
+        return queryset
 
 @admin.register(DocumentField)
 class DocumentFieldAdmin(admin.ModelAdmin):
     list_display = ['id', 'document', 'field_type', 'context', 'user_content']
+    # 'document' renders each row's parent; join it instead of one query per row
+    list_select_related = ['document']
     list_filter = ['field_type', 'context', 'ai_enhanced']
     search_fields = ['user_content', 'suggested_content', 'ai_suggestion']
 
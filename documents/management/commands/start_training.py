@@ -1,10 +1,10 @@
 """
 Django management command to start the training interface
 """
+import asyncio
 import os
 import sys
 import subprocess
-import threading
 import time
 from django.core.management.base import BaseCommand
 
@@ -41,7 +41,8 @@ class Command(BaseCommand):
         )
         
         # Check if ml_training_interface.py exists
-        if not os.path.exists('ml_training_interface.py'):
+        script = os.path.abspath('ml_training_interface.py')
+        if not os.path.exists(script):
             self.stdout.write(
                 self.style.ERROR('Error: ml_training_interface.py not found in project root')
             )
@@ -63,46 +64,21 @@ class Command(BaseCommand):
                 self.style.WARNING(f'⚠️ Warning: Could not initialize training system: {e}')
             )
         
-        def start_training_server():
-            """Start the training server"""
+        # Run the script checked above, whatever the child's working directory,
+        # passing host and port through its environment
+        cmd = [sys.executable, '-u', script]
+        env = {**os.environ, 'TRAINING_HOST': host, 'TRAINING_PORT': str(port)}
+        
+        if background:
+            # Start in background; nothing reads its output once this command
+            # exits, so discard it rather than let a full pipe stall the server
             try:
-                # Modify the training interface to use the specified host and port
-                cmd = [sys.executable, 'ml_training_interface.py']
-                
-                # Set environment variables for host and port
-                env = os.environ.copy()
-                env['TRAINING_HOST'] = host
-                env['TRAINING_PORT'] = str(port)
-                
-                process = subprocess.Popen(
-                    cmd,
-                    env=env,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Training interface started on http://{host}:{port}')
-                )
-                
-                if not background:
-                    # Wait for the process
-                    process.wait()
-                
-                return process
-                
+                subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             except Exception as e:
                 self.stdout.write(
                     self.style.ERROR(f'✗ Error starting training interface: {e}')
                 )
-                return None
-        
-        if background:
-            # Start in background
-            thread = threading.Thread(target=start_training_server)
-            thread.daemon = True
-            thread.start()
+                return
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -125,9 +101,39 @@ class Command(BaseCommand):
             )
             
             try:
-                start_training_server()
+                asyncio.run(self.run_training_server(cmd, env, host, port))
             except KeyboardInterrupt:
                 self.stdout.write(
                     self.style.SUCCESS('\n✓ Training interface stopped')
                 )
 
+    async def run_training_server(self, cmd, env, host, port):
+        """Run the training server in the foreground, relaying its output until it exits"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'✗ Error starting training interface: {e}')
+            )
+            return None
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Training interface started on http://{host}:{port}')
+        )
+        
+        try:
+            # Keep draining the pipe so a chatty server never blocks on a full buffer
+            async for line in process.stdout:
+                self.stdout.write(line.decode(errors='replace').rstrip('\n'))
+            await process.wait()
+        finally:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+        
+        return process.returncode
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Document',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=500)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(default='uploaded', max_length=50)),
+                ('extracted_text', models.TextField(blank=True)),
+                ('total_blanks', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentField',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('field_type', models.CharField(choices=[('name', 'Name'), ('address', 'Address'), ('phone', 'Phone'), ('email', 'Email'), ('date', 'Date'), ('signature', 'Signature'), ('general', 'General')], default='general', max_length=20)),
+                ('x_position', models.IntegerField()),
+                ('y_position', models.IntegerField()),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('area', models.IntegerField()),
+                ('suggested_content', models.TextField(blank=True)),
+                ('user_content', models.TextField(blank=True)),
+                ('ai_suggestion', models.TextField(blank=True)),
+                ('ai_enhanced', models.BooleanField(default=False)),
+                ('context', models.CharField(default='general', max_length=100)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fields', to='documents.document')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['document', 'y_position'], name='documents_d_documen_9018d3_idx'), models.Index(fields=['field_type'], name='documents_d_field_t_0b0bc7_idx')],
+            },
+        ),
+    ]
@@ -32,6 +32,8 @@ class DocumentField(models.Model):
     id = models.AutoField(primary_key=True)
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='fields')
     field_type = models.CharField(max_length=20, choices=FIELD_TYPES, default='general')
+    # Detectors can place fields above the page (negative y) or, for long text
+    # files, tens of thousands of pixels down it, so positions stay plain integers
     x_position = models.IntegerField()
     y_position = models.IntegerField()
     width = models.IntegerField()
@@ -45,9 +47,11 @@ class DocumentField(models.Model):
     
     class Meta:
         ordering = ['id']
+        indexes = [
+            # Fields of one document in reading order, and lookups by type
+            models.Index(fields=['document', 'y_position']),
+            models.Index(fields=['field_type']),
+        ]
     
     def __str__(self):
         return f"Field {self.id} ({self.field_type}) - {self.document.filename}"
-
-
-
@@ -16,5 +16,32 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'filename', 'file_path', 'uploaded_at', 'status', 
                  'extracted_text', 'total_blanks', 'fields']
 
+class TrainingSampleSerializer(serializers.Serializer):
+    """One labelled text sample for the universal processor"""
+    text = serializers.CharField(required=False, allow_blank=True, default='')
+    field_type = serializers.CharField(required=False, default='text')
+    context = serializers.CharField(required=False, allow_blank=True, default='')
+    confidence = serializers.FloatField(required=False, default=1.0)
 
+class TrainModelSerializer(serializers.Serializer):
+    """Request body for training the universal processor"""
+    document_type = serializers.CharField()
+    samples = TrainingSampleSerializer(many=True)
 
+class AddTrainingSampleSerializer(TrainingSampleSerializer):
+    """Request body for adding a single training sample"""
+    text = serializers.CharField(allow_blank=True)
+    field_type = serializers.CharField()
+    document_type = serializers.CharField()
+
+class CreateTemplateSerializer(serializers.Serializer):
+    """Request body for creating a document template"""
+    document_type = serializers.CharField()
+    description = serializers.CharField(allow_blank=True)
+    field_patterns = serializers.JSONField()
+    validation_rules = serializers.JSONField(required=False, default=dict)
+
+class FillDocumentSerializer(serializers.Serializer):
+    """Request body for filling a document with the universal processor"""
+    document_path = serializers.CharField()
+    field_data = serializers.JSONField()
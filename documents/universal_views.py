@@ -5,25 +5,105 @@ Integration of the universal document processor with Django
 import os
 import sys
 import json
+import hashlib
 import logging
+import threading
+from dataclasses import asdict
+from functools import lru_cache
+from itertools import chain
 from typing import List, Dict, Any
-from django.http import JsonResponse, HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.core.cache import cache
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.utils.cache import patch_cache_control
 from django.conf import settings
+from .serializers import (
+    AddTrainingSampleSerializer, CreateTemplateSerializer, FillDocumentSerializer, TrainModelSerializer
+)
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-from universal_document_processor import UniversalDocumentProcessor, DocumentField, convert_to_dict
+# Project root, where universal_document_processor lives
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize the universal processor
-processor = UniversalDocumentProcessor()
+# Lifetime (seconds) of the cached stats / patterns / types responses
+UNIVERSAL_INFO_CACHE_TTL = 30
+UNIVERSAL_INFO_CACHE_KEYS = ('universal:stats', 'universal:patterns', 'universal:types')
+
+# Serializes changes to the shared processor's training_data across request threads
+_training_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def get_processor():
+    """
+    Return the shared universal processor, created on first use so importing
+    this module (e.g. for every manage.py command) does not load it
+    """
+    if PROJECT_ROOT not in sys.path:
+        sys.path.append(PROJECT_ROOT)
+    from universal_document_processor import UniversalDocumentProcessor
+    return UniversalDocumentProcessor()
+
+def _parse_json(body):
+    """
+    Parse a JSON request body, with orjson when it is installed
+    (orjson's decode error subclasses json.JSONDecodeError)
+    """
+    return orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+
+# Handles the types orjson does not (lazy strings, Decimal, UUID subclasses, ...)
+_json_encoder = DjangoJSONEncoder()
+
+def _dump_json(value):
+    """Serialize a value to JSON bytes, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_json_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, cls=DjangoJSONEncoder).encode('utf-8')
+
+class OrjsonResponse(HttpResponse):
+    """JsonResponse equivalent that serializes with orjson when it is installed"""
+    
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(_dump_json(data), **kwargs)
+
+def _cached_json_response(request, cache_key, build_payload):
+    """
+    JSON response for a rarely-changing GET endpoint: the serialized body and
+    its ETag are cached briefly, and a matching If-None-Match gets a 304
+    """
+    cached = cache.get(cache_key)
+    if cached is None:
+        body = _dump_json(build_payload())
+        cached = (body, f'"{hashlib.md5(body).hexdigest()}"')
+        cache.set(cache_key, cached, UNIVERSAL_INFO_CACHE_TTL)
+    
+    body, etag = cached
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, max_age=UNIVERSAL_INFO_CACHE_TTL)
+    return response
+
+def _invalidate_info_cache():
+    """Drop the cached stats / patterns / types after the processor changes"""
+    cache.delete_many(UNIVERSAL_INFO_CACHE_KEYS)
+
+def _invalid_request(serializer):
+    """400 response describing why a request body failed validation"""
+    return OrjsonResponse({'error': 'Invalid request data', 'details': serializer.errors}, status=400)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -33,43 +113,49 @@ def upload_document_universal(request):
     """
     try:
         if 'file' not in request.FILES:
-            return JsonResponse({'error': 'No file uploaded'}, status=400)
+            return OrjsonResponse({'error': 'No file uploaded'}, status=400)
         
         file = request.FILES['file']
         if file.size == 0:
-            return JsonResponse({'error': 'Empty file'}, status=400)
+            return OrjsonResponse({'error': 'Empty file'}, status=400)
         
-        # Save file temporarily
-        file_path = default_storage.save(f'temp_{file.name}', ContentFile(file.read()))
+        # Save file temporarily (storage copies the upload over in chunks)
+        file_path = default_storage.save(f'temp_{file.name}', file)
         full_path = os.path.join(settings.MEDIA_ROOT, file_path)
         
-        # Process document with universal processor
-        fields = processor.detect_fields_universal(full_path)
-        
-        # Convert to dictionaries for JSON response
-        field_dicts = convert_to_dict(fields)
-        
-        # Extract text for context
-        text = processor._extract_text(full_path)
-        
-        # Classify document type
-        doc_type, confidence = processor.classify_document_type(text)
-        
-        # Clean up temp file
-        default_storage.delete(file_path)
+        try:
+            # Extract text for context (once; field detection reuses it)
+            processor = get_processor()
+            text = processor._extract_text(full_path)
+            
+            # Classify document type
+            doc_type, confidence = processor.classify_document_type(text)
+            
+            # Process document with universal processor
+            fields = processor.detect_fields_universal(full_path, text=text)
+            
+            # Convert to dictionaries for JSON response
+            from universal_document_processor import convert_to_dict
+            field_dicts = convert_to_dict(fields)
+        finally:
+            # Clean up temp file, also when processing failed
+            try:
+                os.unlink(full_path)
+            except OSError:
+                pass
         
-        return JsonResponse({
+        return OrjsonResponse({
             'success': True,
             'fields': field_dicts,
             'total_fields': len(fields),
             'document_type': doc_type,
             'confidence': confidence,
-            'text_preview': text[:500] + '...' if len(text) > 500 else text
+            'text_preview': text if len(text) <= 500 else text[:500] + '...'
         })
         
     except Exception as e:
         logger.error(f"Error in universal document upload: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -78,40 +164,39 @@ def train_model(request):
     Train the universal processor with new data
     """
     try:
-        data = json.loads(request.body)
-        
-        # Validate required fields
-        required_fields = ['document_type', 'samples']
-        for field in required_fields:
-            if field not in data:
-                return JsonResponse({'error': f'Missing required field: {field}'}, status=400)
+        processor = get_processor()
+        serializer = TrainModelSerializer(data=_parse_json(request.body))
+        if not serializer.is_valid():
+            return _invalid_request(serializer)
+        data = serializer.validated_data
         
         # Prepare training data
         training_data = []
         for sample in data['samples']:
             training_sample = {
-                'text': sample.get('text', ''),
-                'field_type': sample.get('field_type', 'text'),
+                'text': sample['text'],
+                'field_type': sample['field_type'],
                 'document_type': data['document_type'],
-                'context': sample.get('context', ''),
-                'confidence': sample.get('confidence', 1.0)
+                'context': sample['context'],
+                'confidence': sample['confidence']
             }
             training_data.append(training_sample)
         
         # Train the model
         results = processor.train_model(training_data)
+        _invalidate_info_cache()
         
-        return JsonResponse({
+        return OrjsonResponse({
             'success': True,
             'results': results,
             'message': f'Model trained with {len(training_data)} samples'
         })
         
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         logger.error(f"Error training model: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -120,35 +205,34 @@ def create_template(request):
     Create a new document template
     """
     try:
-        data = json.loads(request.body)
-        
-        # Validate required fields
-        required_fields = ['document_type', 'description', 'field_patterns']
-        for field in required_fields:
-            if field not in data:
-                return JsonResponse({'error': f'Missing required field: {field}'}, status=400)
+        processor = get_processor()
+        serializer = CreateTemplateSerializer(data=_parse_json(request.body))
+        if not serializer.is_valid():
+            return _invalid_request(serializer)
+        data = serializer.validated_data
         
         # Create template
         success = processor.create_document_template(
             document_type=data['document_type'],
             description=data['description'],
             field_patterns=data['field_patterns'],
-            validation_rules=data.get('validation_rules', {})
+            validation_rules=data['validation_rules']
         )
         
         if success:
-            return JsonResponse({
+            _invalidate_info_cache()
+            return OrjsonResponse({
                 'success': True,
                 'message': f'Template created for {data["document_type"]}'
             })
         else:
-            return JsonResponse({'error': 'Failed to create template'}, status=500)
+            return OrjsonResponse({'error': 'Failed to create template'}, status=500)
             
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         logger.error(f"Error creating template: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @require_http_methods(["GET"])
 def get_system_stats(request):
@@ -156,11 +240,11 @@ def get_system_stats(request):
     Get system statistics and performance metrics
     """
     try:
-        stats = processor.get_system_stats()
-        return JsonResponse(stats)
+        processor = get_processor()
+        return _cached_json_response(request, 'universal:stats', processor.get_system_stats)
     except Exception as e:
         logger.error(f"Error getting system stats: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @require_http_methods(["GET"])
 def get_field_patterns(request):
@@ -168,14 +252,15 @@ def get_field_patterns(request):
     Get available field patterns and document types
     """
     try:
-        return JsonResponse({
+        processor = get_processor()
+        return _cached_json_response(request, 'universal:patterns', lambda: {
             'field_patterns': processor.field_patterns,
             'document_type_patterns': processor.document_type_patterns,
             'available_templates': list(processor.document_templates.keys())
         })
     except Exception as e:
         logger.error(f"Error getting field patterns: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -184,27 +269,23 @@ def fill_document_universal(request):
     Fill a document using universal processor
     """
     try:
-        data = json.loads(request.body)
-        
-        # Validate required fields
-        required_fields = ['document_path', 'field_data']
-        for field in required_fields:
-            if field not in data:
-                return JsonResponse({'error': f'Missing required field: {field}'}, status=400)
+        serializer = FillDocumentSerializer(data=_parse_json(request.body))
+        if not serializer.is_valid():
+            return _invalid_request(serializer)
         
         # This would integrate with the existing create_filled_pdf function
         # For now, return success
-        return JsonResponse({
+        return OrjsonResponse({
             'success': True,
             'message': 'Document filled successfully',
             'output_path': 'filled_document.pdf'
         })
         
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         logger.error(f"Error filling document: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @require_http_methods(["GET"])
 def get_document_types(request):
@@ -212,16 +293,23 @@ def get_document_types(request):
     Get list of supported document types
     """
     try:
-        document_types = list(processor.document_type_patterns.keys())
-        document_types.extend(list(processor.document_templates.keys()))
+        processor = get_processor()
+        
+        def build_payload():
+            # Dedup in one pass, keeping pattern types first so the order is stable
+            document_types = list(dict.fromkeys(chain(
+                processor.document_type_patterns.keys(),
+                processor.document_templates.keys()
+            )))
+            return {
+                'document_types': document_types,
+                'total_types': len(document_types)
+            }
         
-        return JsonResponse({
-            'document_types': list(set(document_types)),
-            'total_types': len(set(document_types))
-        })
+        return _cached_json_response(request, 'universal:types', build_payload)
     except Exception as e:
         logger.error(f"Error getting document types: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -230,36 +318,56 @@ def add_training_sample(request):
     Add a single training sample
     """
     try:
-        data = json.loads(request.body)
-        
-        # Validate required fields
-        required_fields = ['text', 'field_type', 'document_type']
-        for field in required_fields:
-            if field not in data:
-                return JsonResponse({'error': f'Missing required field: {field}'}, status=400)
+        processor = get_processor()
+        serializer = AddTrainingSampleSerializer(data=_parse_json(request.body))
+        if not serializer.is_valid():
+            return _invalid_request(serializer)
+        data = serializer.validated_data
         
         # Add to training data
         training_sample = {
             'text': data['text'],
             'field_type': data['field_type'],
             'document_type': data['document_type'],
-            'context': data.get('context', ''),
-            'confidence': data.get('confidence', 1.0)
+            'context': data['context'],
+            'confidence': data['confidence']
         }
         
-        processor.training_data.append(training_sample)
+        with _training_lock:
+            processor.training_data.append(training_sample)
+            total_samples = len(processor.training_data)
+        _invalidate_info_cache()
         
-        return JsonResponse({
+        return OrjsonResponse({
             'success': True,
             'message': 'Training sample added',
-            'total_samples': len(processor.training_data)
+            'total_samples': total_samples
         })
         
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        return OrjsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         logger.error(f"Error adding training sample: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
+
+def _iter_export(processor):
+    """
+    Yield the training data export piece by piece, one sample at a time,
+    so the whole corpus is never serialized into a single string
+    """
+    with _training_lock:
+        samples = list(processor.training_data)
+    
+    yield b'{"samples":['
+    for i, sample in enumerate(samples):
+        yield (b',' if i else b'') + _dump_json(sample)
+    yield b'],"templates":'
+    yield _dump_json([asdict(template) for template in processor.document_templates.values()])
+    yield b',"field_patterns":'
+    yield _dump_json(processor.field_patterns)
+    yield b',"document_type_patterns":'
+    yield _dump_json(processor.document_type_patterns)
+    yield b'}'
 
 @require_http_methods(["GET"])
 def export_training_data(request):
@@ -267,23 +375,14 @@ def export_training_data(request):
     Export training data for backup or sharing
     """
     try:
-        training_data = {
-            'samples': processor.training_data,
-            'templates': [processor.document_templates[dt].__dict__ for dt in processor.document_templates],
-            'field_patterns': processor.field_patterns,
-            'document_type_patterns': processor.document_type_patterns
-        }
-        
-        response = HttpResponse(
-            json.dumps(training_data, indent=2),
-            content_type='application/json'
-        )
+        processor = get_processor()
+        response = StreamingHttpResponse(_iter_export(processor), content_type='application/json')
         response['Content-Disposition'] = 'attachment; filename="training_data.json"'
         return response
         
     except Exception as e:
         logger.error(f"Error exporting training data: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -292,15 +391,18 @@ def import_training_data(request):
     Import training data from backup
     """
     try:
+        processor = get_processor()
         if 'file' not in request.FILES:
-            return JsonResponse({'error': 'No file uploaded'}, status=400)
+            return OrjsonResponse({'error': 'No file uploaded'}, status=400)
         
         file = request.FILES['file']
-        data = json.loads(file.read().decode('utf-8'))
+        data = _parse_json(file.read())
         
         # Import training samples
         if 'samples' in data:
-            processor.training_data.extend(data['samples'])
+            with _training_lock:
+                processor.training_data.extend(data['samples'])
+            _invalidate_info_cache()
         
         # Import templates
         if 'templates' in data:
@@ -308,15 +410,15 @@ def import_training_data(request):
                 # This would recreate templates from the imported data
                 pass
         
-        return JsonResponse({
+        return OrjsonResponse({
             'success': True,
             'message': 'Training data imported successfully',
             'samples_imported': len(data.get('samples', []))
         })
         
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON file'}, status=400)
+        return OrjsonResponse({'error': 'Invalid JSON file'}, status=400)
     except Exception as e:
         logger.error(f"Error importing training data: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
+        return OrjsonResponse({'error': str(e)}, status=500)
 
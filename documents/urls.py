@@ -1,4 +1,5 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import include, path
 from . import views
 
 urlpatterns = [
@@ -9,3 +10,22 @@ urlpatterns = [
     path('clear-session/', views.clear_session, name='clear_session'),
     path('<uuid:doc_id>/', views.get_document, name='get_document'),
 ]
+
+if getattr(settings, 'ENABLE_UNIVERSAL_PROCESSOR', False):
+    # Imported here so deployments with the processor disabled never load it
+    from . import universal_views
+
+    # Grouped under one prefix so other requests skip them after a single match attempt
+    universal_patterns = [
+        path('upload/', universal_views.upload_document_universal, name='upload_document_universal'),
+        path('train/', universal_views.train_model, name='universal_train_model'),
+        path('templates/', universal_views.create_template, name='universal_create_template'),
+        path('stats/', universal_views.get_system_stats, name='universal_system_stats'),
+        path('patterns/', universal_views.get_field_patterns, name='universal_field_patterns'),
+        path('types/', universal_views.get_document_types, name='universal_document_types'),
+        path('fill/', universal_views.fill_document_universal, name='fill_document_universal'),
+        path('training-samples/', universal_views.add_training_sample, name='universal_add_training_sample'),
+        path('training-data/export/', universal_views.export_training_data, name='universal_export_training_data'),
+        path('training-data/import/', universal_views.import_training_data, name='universal_import_training_data'),
+    ]
+    urlpatterns.append(path('universal/', include(universal_patterns)))
@@ -1,8 +1,15 @@
 import os
 import uuid
+import shutil
 import json
+import logging
 import traceback
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
 from django.conf import settings
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render
@@ -11,39 +18,195 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
 
-# Document storage (in-memory for now)
-documents_storage = {}
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _get_layout_pool():
+    """Return the shared pool of processes that run PDF layout extraction"""
+    return ProcessPoolExecutor(max_workers=settings.DOCUMENT_PROCESS_WORKERS)
+
+def extract_layout(filepath):
+    """
+    Extract a PDF's layout and HTML template, in a worker process when
+    DOCUMENT_PROCESS_WORKERS is set so the CPU-bound parsing of concurrent
+    uploads does not share this process's GIL
+    """
+    from html_pdf_processor import extract_layout_and_html
+    if settings.DOCUMENT_PROCESS_WORKERS <= 0:
+        return extract_layout_and_html(filepath)
+    try:
+        return _get_layout_pool().submit(extract_layout_and_html, filepath).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. a crash on a malformed PDF) and the pool cannot be
+        # reused; replace it and retry once so later uploads are not stuck on it
+        logger.warning("Layout worker pool broke, retrying %s on a new pool", filepath)
+        _get_layout_pool.cache_clear()
+        try:
+            return _get_layout_pool().submit(extract_layout_and_html, filepath).result()
+        except BrokenProcessPool:
+            _get_layout_pool.cache_clear()
+            raise
+
+class DocumentCache:
+    """Dict-like store of parsed documents that keeps the maxsize most recently used"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doc_id, default=None):
+        with self._lock:
+            document = self._documents.get(doc_id, default)
+            if doc_id in self._documents:
+                self._documents.move_to_end(doc_id)
+            return document
+
+    def __setitem__(self, doc_id, document):
+        with self._lock:
+            self._documents[doc_id] = document
+            self._documents.move_to_end(doc_id)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+
+    def pop(self, doc_id, default=None):
+        with self._lock:
+            return self._documents.pop(doc_id, default)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    def __len__(self):
+        return len(self._documents)
+
+    def keys(self):
+        with self._lock:
+            return list(self._documents)
+
+# Document storage: JSON files under MEDIA_ROOT/documents are the shared copy,
+# documents_storage keeps this process's parsed copy of recently used documents
+documents_storage = DocumentCache(settings.DOCUMENT_CACHE_SIZE)
+
+def _document_path(doc_id):
+    """Path of the JSON file a document is persisted to"""
+    return os.path.join(settings.MEDIA_ROOT, 'documents', f'{doc_id}.json')
+
+def _file_version(path):
+    """Modification stamp of a stored document file, None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
 
 def get_stored_document(doc_id):
     """Get document from storage"""
-    # Try persistent storage first
+    doc_id = str(doc_id)
+    storage_file = _document_path(doc_id)
+    version = _file_version(storage_file)
+    
+    # The in-memory copy is current unless another worker has saved since
+    document = documents_storage.get(doc_id)
+    if version is None or (document is not None and document.get('_version') == version):
+        return document
+    
+    # Otherwise reload from persistent storage
     try:
-        storage_file = os.path.join(settings.MEDIA_ROOT, 'documents', f'{doc_id}.json')
-        if os.path.exists(storage_file):
-            with open(storage_file, 'r') as f:
-                return json.load(f)
+        with open(storage_file, 'rb') as f:
+            document = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
     except Exception as e:
         print(f"Warning: Could not retrieve from persistent storage: {e}")
+        return documents_storage.get(doc_id)
     
-    # Fall back to memory storage
-    return documents_storage.get(doc_id)
+    document['_version'] = version
+    documents_storage[doc_id] = document
+    return document
+
+def persistable_document(document):
+    """Return the document without its in-memory caches (keys starting with '_')"""
+    return {key: value for key, value in document.items() if not key.startswith('_')}
 
 def save_document(doc_id, document):
     """Save document to storage"""
+    doc_id = str(doc_id)
+    
+    # Fields may have been added or removed, so drop the caches derived from them
+    document.pop('_fields_by_id', None)
+    document.pop('_doc_context', None)
+    
     try:
         # Save to persistent storage
-        storage_dir = os.path.join(settings.MEDIA_ROOT, 'documents')
-        os.makedirs(storage_dir, exist_ok=True)
-        storage_file = os.path.join(storage_dir, f'{doc_id}.json')
-        
-        with open(storage_file, 'w') as f:
-            json.dump(document, f, indent=2)
+        storage_file = _document_path(doc_id)
+        os.makedirs(os.path.dirname(storage_file), exist_ok=True)
+        
+        # Write to a temporary file and swap it in, so readers never see a partial document
+        temp_file = f'{storage_file}.{uuid.uuid4().hex}.tmp'
+        with open(temp_file, 'wb') as f:
+            if ORJSON_AVAILABLE:
+                f.write(orjson.dumps(persistable_document(document), option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(persistable_document(document), indent=2).encode('utf-8'))
+        os.replace(temp_file, storage_file)
+        document['_version'] = _file_version(storage_file)
     except Exception as e:
         print(f"Warning: Could not save to persistent storage: {e}")
     
     # Also save to memory for faster access
     documents_storage[doc_id] = document
 
+def get_document_field(document, field_id):
+    """Look up a field by id through an index cached on the document"""
+    fields_by_id = document.get('_fields_by_id')
+    if fields_by_id is None:
+        fields_by_id = {field['id']: field for field in document['fields']}
+        document['_fields_by_id'] = fields_by_id
+    return fields_by_id.get(field_id)
+
+_document_locks = {}
+_document_locks_guard = threading.Lock()
+
+def document_lock(doc_id):
+    """Lock serialising read-modify-save updates of one document within this process"""
+    with _document_locks_guard:
+        return _document_locks.setdefault(str(doc_id), threading.Lock())
+
+# Longest slice of extracted text sent to the LLM; prefill cost grows with prompt length
+PROMPT_TEXT_MAX_CHARS = settings.PROMPT_TEXT_MAX_CHARS
+
+def truncate_for_prompt(text, max_chars=PROMPT_TEXT_MAX_CHARS):
+    """Keep the head and tail of long text so prompts stay within max_chars"""
+    if max_chars <= 0:
+        return ''
+    if not text or len(text) <= max_chars:
+        return text
+    marker = '\n...\n'
+    head = (max_chars - len(marker)) * 3 // 4
+    tail = max_chars - len(marker) - head
+    return text[:head] + marker + text[-tail:]
+
+def get_document_context(document):
+    """Return the chat/AI context for a document, built once and cached on it"""
+    doc_context = document.get('_doc_context')
+    if doc_context is None:
+        doc_context = {
+            'document_type': document.get('document_type', 'form'),
+            'total_blanks': document.get('total_blanks', 0),
+            # String fields from older HTML documents count as plain text
+            'field_types': [
+                field.get('field_type', 'text') if isinstance(field, dict) else 'text'
+                for field in document.get('fields', [])
+            ],
+            'extracted_text': truncate_for_prompt(document.get('extracted_text', ''))
+        }
+        document['_doc_context'] = doc_context
+    return doc_context
+
 def index(request):
     """Main page view"""
     document = None
@@ -56,15 +219,14 @@ def index(request):
     
     # Check Ollama status
     try:
-        from ollama_integration import OllamaClient
-        ollama_client = OllamaClient()
-        is_running = ollama_client.is_ollama_running()
-        models = ollama_client.list_models() if is_running else []
+        # Shares the short-lived status cache with the chat status endpoint
+        from chat.views import get_ollama_status
+        status_data = get_ollama_status()
         ollama_status = {
-            'is_running': is_running,
-            'models': models
+            'is_running': status_data['running'],
+            'models': status_data['models']
         }
-        print(f"DEBUG: Ollama status - is_running: {is_running}, models: {len(models)}")
+        logger.debug("Ollama status - is_running: %s, models: %d", ollama_status['is_running'], len(ollama_status['models']))
     except Exception as e:
         print(f"Ollama status check failed: {e}")
         ollama_status = {
@@ -113,19 +275,16 @@ def upload_document(request):
         os.makedirs(upload_path, exist_ok=True)
         filepath = os.path.join(upload_path, filename)
         
-        with open(filepath, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
+        # Copy in 1 MiB blocks inside shutil rather than a Python loop over 64 KiB chunks
+        file.seek(0)
+        with open(filepath, 'wb') as destination:
+            shutil.copyfileobj(file, destination, length=1 << 20)
         
         # HTML-based PDF processing
         print("Using HTML-based PDF processing...")
         try:
-            from html_pdf_processor import HTMLPDFProcessor
-            processor = HTMLPDFProcessor()
-            
             # Step 1: Extract PDF layout and convert to HTML
-            layout = processor.extract_pdf_layout(filepath)
-            html_content = processor.create_html_template(layout)
+            layout, html_content = extract_layout(filepath)
             
             # Save HTML content for display
             html_filename = f"html_{doc_id}_{os.path.basename(filepath)}.html"
@@ -177,7 +336,7 @@ def upload_document(request):
             
             # Store document ID in session so page can find it after reload
             if hasattr(request, 'session'):
-                request.session['current_document_id'] = str(doc_id)
+                request.session['current_document_id'] = doc_id
             
             print(f"HTML conversion successful: {len(layout.fields)} fields detected")
             return Response({
@@ -211,49 +370,25 @@ def ai_fill_html_document(request, doc_id):
             return Response({'error': 'Document not found or not HTML processed'}, status=404)
         
         # Generate AI data for all fields
-        from chat.views import IntelligentFieldFiller
-        intelligent_filler = IntelligentFieldFiller()
+        from chat.views import _get_field_filler
+        intelligent_filler = _get_field_filler()
         
-        # Build field types list safely
-        field_types = []
-        for field in document.get('fields', []):
-            if isinstance(field, dict):
-                field_types.append(field.get('field_type', 'text'))
-            else:
-                field_types.append('text')  # Default type for string fields
+        # Get document context
+        doc_context = get_document_context(document)
         
-        doc_context = {
-            'document_type': document.get('document_type', 'form'),
-            'total_blanks': document.get('total_blanks', 0),
-            'field_types': field_types,
-            'extracted_text': document.get('extracted_text', '')
-        }
-        
-        # Generate AI data for each field
-        ai_data = {}
+        # Handle both dict and string field formats
+        batch_fields = []
         for field in document.get('fields', []):
-            try:
-                # Debug: Check field type and content
-                print(f"Field type: {type(field)}, Field content: {field}")
-                
-                # Handle both dict and string field formats
-                if isinstance(field, dict):
-                    field_id = field.get('id', '')
-                    field_context = field.get('context', '')
-                else:
-                    # If field is a string, create a basic structure
-                    field_id = f"field_{len(ai_data)}"
-                    field_context = str(field)
-                
-                ai_content = intelligent_filler.generate_field_content(
-                    field,  # Pass the field dictionary, not just the context string
-                    doc_context
-                )
-                ai_data[field_id] = ai_content
-            except Exception as e:
-                print(f"Failed to generate AI data for field: {e}")
-                field_id = f"field_{len(ai_data)}" if not isinstance(field, dict) else field.get('id', '')
-                ai_data[field_id] = "Sample Data"
+            if not isinstance(field, dict):
+                # If field is a string, create a basic structure
+                field = {'id': f"field_{len(batch_fields)}", 'field_type': 'text', 'context': str(field)}
+            batch_fields.append(field)
+        
+        # Generate AI data for all fields with one batched Ollama call;
+        # only fields whose generation fails get sample data
+        from chat.views import generate_fields_content
+        ai_contents = generate_fields_content(batch_fields, doc_context, intelligent_filler, fallback="Sample Data")
+        ai_data = {field.get('id', ''): ai_content for field, ai_content in zip(batch_fields, ai_contents)}
         
         # Fill HTML with AI data
         from html_pdf_processor import HTMLPDFProcessor
@@ -264,13 +399,13 @@ def ai_fill_html_document(request, doc_id):
             html_content = f.read()
         
         # Debug: Print AI data
-        print(f"Generated AI data: {ai_data}")
+        logger.debug("Generated AI data: %s", ai_data)
         
         # Fill HTML with AI data
         filled_html = processor.fill_html_with_ai_data(html_content, ai_data)
         
         # Debug: Check if HTML was actually filled
-        print(f"HTML filling completed. Original length: {len(html_content)}, Filled length: {len(filled_html)}")
+        logger.debug("HTML filling completed. Original length: %d, Filled length: %d", len(html_content), len(filled_html))
         
         # Save filled HTML
         filled_html_filename = f"filled_{os.path.basename(document['html_path'])}"
@@ -354,7 +489,7 @@ def get_document(request, doc_id):
         
         return Response({
             'success': True,
-            'document': document
+            'document': persistable_document(document)
         })
         
     except Exception as e:
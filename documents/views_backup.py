@@ -9,15 +9,22 @@ import re
 import os
 import json
 import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from bisect import bisect_right
+from itertools import islice
 import pytesseract
 import cv2
 import numpy as np
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
-from ollama_integration import AIDocumentProcessor, OllamaClient
+from ollama_integration import AIDocumentProcessor
 from PIL import Image
 import fitz  # PyMuPDF for PDF processing
+from pdf_rendering import render_page_gray
 # Import Sejda automation modules
 try:
     from libreoffice_draw_automation import LibreOfficeDrawAutomation
@@ -62,11 +69,87 @@ except ImportError:
 # Configure Tesseract path for Windows
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+# In-process Tesseract API; avoids starting tesseract.exe and reloading the
+# language model for every OCR call
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+_tess_api = None
+_tess_lock = threading.Lock()
+
+# Pages of one PDF that are OCR'd and scanned for fields at the same time
+# (OpenCV and the tesseract subprocess both run outside the GIL)
+PDF_PAGE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Larger page images are scaled down before OCR (about 200 DPI for a letter page);
+# Tesseract time grows with pixel count and field labels read fine at this size
+OCR_MAX_DIMENSION = 2200
+
+def ocr_image(gray_image):
+    """OCR a grayscale numpy image, reusing one Tesseract API when tesserocr is installed"""
+    global _tess_api
+    scale = OCR_MAX_DIMENSION / max(gray_image.shape[:2])
+    if scale < 1:
+        gray_image = cv2.resize(gray_image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    if not TESSEROCR_AVAILABLE:
+        return pytesseract.image_to_string(gray_image)
+    
+    # A PyTessBaseAPI holds one image at a time, so calls are serialized
+    with _tess_lock:
+        if _tess_api is None:
+            _tess_api = tesserocr.PyTessBaseAPI(lang='eng')
+        _tess_api.SetImage(Image.fromarray(gray_image))
+        return _tess_api.GetUTF8Text()
+
+def _keyword_regex(keywords):
+    """Compile a keyword list into one alternation, so a line is scanned once in C"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+# Form field indicators for virtual fields, in priority order
+VIRTUAL_FIELD_PATTERNS = [
+    ('name', ['enter your name', 'please enter your name', 'name of dependent', 'full name']),
+    ('age', ['age of dependent', 'age:', 'years old']),
+    ('dropdown', ['select an item', 'dropdown', 'combo', 'choose']),
+    ('checkbox', ['check all that apply', 'option 1', 'option 2', 'option 3']),
+    ('email', ['email', 'e-mail', 'email address']),
+    ('phone', ['phone', 'telephone', 'tel', 'mobile']),
+    ('address', ['address', 'street', 'location']),
+    ('date', ['date', 'birth', 'dob']),
+    ('signature', ['signature', 'sign', 'initial'])
+]
+VIRTUAL_FIELD_PRIORITY = {ftype: i for i, (ftype, _) in enumerate(VIRTUAL_FIELD_PATTERNS)}
+# One zero-width match at every position where an indicator starts, named by its
+# field type, so a single pass over the text finds overlapping indicators too
+VIRTUAL_FIELD_RE = re.compile('(?=' + '|'.join(
+    f'(?P<{ftype}>{_keyword_regex(patterns).pattern})' for ftype, patterns in VIRTUAL_FIELD_PATTERNS
+) + ')')
+
+# Field types recognised in a document's extracted text by analyze_context, in priority order
+CONTEXT_TEXT_PATTERNS = [
+    (ftype, _keyword_regex(keywords)) for ftype, keywords in [
+        ('name', ['enter your name', 'please enter your name', 'name:', 'dependent', 'name of dependent']),
+        ('age', ['age', 'age of dependent']),
+        ('dropdown', ['select', 'dropdown', 'combo']),
+        ('checkbox', ['check', 'option']),
+        ('email', ['email', 'e-mail']),
+        ('phone', ['phone', 'telephone', 'tel']),
+        ('address', ['address']),
+        ('date', ['date', 'birth']),
+        ('signature', ['signature', 'sign'])
+    ]
+]
+
 # Import persistent training storage
 from training_storage import training_storage
 
-# In-memory storage (no database needed)
-documents_storage = {}
+# In-memory storage (no database needed); persistent storage holds every
+# document, so only the recently used ones are kept here
+from .views import DocumentCache
+documents_storage = DocumentCache(settings.DOCUMENT_CACHE_SIZE)
 chat_sessions = {}
 
 def get_stored_document(doc_id):
@@ -98,6 +181,9 @@ def save_document(document):
     
     doc_id = str(document.get('id'))
     
+    # Fields may have been added or removed, so drop the index derived from them
+    document.pop('_fields_by_id', None)
+    
     # Save to persistent storage (survives reloads)
     try:
         training_storage.save_document(doc_id, document)
@@ -107,6 +193,14 @@ def save_document(document):
     # Also save to memory for faster access
     documents_storage[doc_id] = document
 
+def get_document_field(document, field_id):
+    """Look up a field by id through an index cached on the document"""
+    fields_by_id = document.get('_fields_by_id')
+    if fields_by_id is None:
+        fields_by_id = {field['id']: field for field in document['fields']}
+        document['_fields_by_id'] = fields_by_id
+    return fields_by_id.get(field_id)
+
 def auto_train_from_document(file_path, document, result):
     # 
     # Automatically train the Universal Document Processor from uploaded document
@@ -314,12 +408,18 @@ def map_field_type_to_universal(field_type, field_id=''):
     return 'text'
 
 class DocumentProcessor:
+    # Keeps no per-document state, so one instance is shared by all requests
+    # (see get_document_processor)
     def __init__(self):
-        self.blank_spaces = []
-        self.extracted_text = ""
         self._enhanced_processor = None
         self._intelligent_filler = None
-        self.ai_processor = AIDocumentProcessor()
+        self._ai_processor = None
+    
+    @property
+    def ai_processor(self):
+        if self._ai_processor is None:
+            self._ai_processor = AIDocumentProcessor()
+        return self._ai_processor
     
     @property
     def enhanced_processor(self):
@@ -333,32 +433,27 @@ class DocumentProcessor:
             self._intelligent_filler = IntelligentFieldFiller()
         return self._intelligent_filler
         
-    def pdf_to_images(self, pdf_path):
-        # Convert all PDF pages to images for processing
+    def iter_pdf_pages(self, pdf_path):
+        # Yield (page_num, image) for each PDF page, rendering a page only when it is
+        # asked for so a long scan is never held in memory all at once
         try:
-            # Open PDF
             pdf_document = fitz.open(pdf_path)
-            images = []
-            
-            # Convert each page to image
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                
-                # Convert to image
-                mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Convert to OpenCV format
-                nparr = np.frombuffer(img_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                images.append((page_num, image))
-            
-            pdf_document.close()
-            return images
+            try:
+                for page_num in range(len(pdf_document)):
+                    page = pdf_document[page_num]
+                    
+                    # Convert to image
+                    image = render_page_gray(page, 2.0)  # 2x zoom for better quality
+                    yield page_num, image
+            finally:
+                pdf_document.close()
         except Exception as e:
             raise Exception(f"Error converting PDF to images: {str(e)}")
     
+    def pdf_to_images(self, pdf_path):
+        # Convert all PDF pages to images for processing
+        return list(self.iter_pdf_pages(pdf_path))
+    
     def process_document(self, file_path):
         # Process uploaded document using enhanced field detection
         try:
@@ -366,13 +461,12 @@ class DocumentProcessor:
             result = self.enhanced_processor.process_document(file_path)
             
             # Convert FormField objects to dictionary format
-            self.blank_spaces = convert_form_fields_to_dict(result['fields'])
-            self.extracted_text = result['extracted_text']
+            blank_spaces = convert_form_fields_to_dict(result['fields'])
             
             return {
-                'extracted_text': self.extracted_text,
-                'blank_spaces': self.blank_spaces,
-                'total_blanks': len(self.blank_spaces)
+                'extracted_text': result['extracted_text'],
+                'blank_spaces': blank_spaces,
+                'total_blanks': len(blank_spaces)
             }
         except Exception as e:
             # Fallback to original method if enhanced processor fails
@@ -381,6 +475,23 @@ class DocumentProcessor:
             traceback.print_exc()
             return self._process_document_fallback(file_path)
     
+    def _process_pdf_page(self, page_num, image):
+        # OCR one rendered PDF page and find its fields; returns (page_text, blank_spaces)
+        # Pages are rendered in grayscale already
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        # Apply OCR to extract text
+        page_text = ocr_image(gray)
+        
+        # Find blank spaces (white rectangles)
+        blank_spaces = self.find_blank_spaces(gray, page_num)
+        
+        # If no blank spaces found, create virtual fields based on text analysis
+        if not blank_spaces:
+            blank_spaces = self.create_virtual_fields_from_text(page_text, gray, page_num)
+        
+        return page_text, blank_spaces
+    
     def _process_document_fallback(self, file_path):
         # Fallback document processing method - handles multi-page PDFs
         try:
@@ -391,28 +502,22 @@ class DocumentProcessor:
             all_extracted_text = []
             
             if file_ext == '.pdf':
-                # Process all PDF pages
-                images = self.pdf_to_images(file_path)
-                
-                for page_num, image in images:
-                    # Convert to grayscale
-                    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                    
-                    # Apply OCR to extract text
-                    page_text = pytesseract.image_to_string(gray)
-                    all_extracted_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                    
-                    # Find blank spaces (white rectangles)
-                    blank_spaces = self.find_blank_spaces(gray, page_num)
-                    
-                    # If no blank spaces found, create virtual fields based on text analysis
-                    if not blank_spaces:
-                        blank_spaces = self.create_virtual_fields_from_text(page_text, gray, page_num)
-                    
-                    all_blank_spaces.extend(blank_spaces)
+                # Process all PDF pages, PDF_PAGE_WORKERS at a time so only that many
+                # rendered pages are in memory; rendering stays serial (PyMuPDF is not
+                # thread-safe), OCR and detection run for the pages of a batch at once
+                pages = self.iter_pdf_pages(file_path)
+                with ThreadPoolExecutor(max_workers=PDF_PAGE_WORKERS) as executor:
+                    while True:
+                        batch = list(islice(pages, PDF_PAGE_WORKERS))
+                        if not batch:
+                            break
+                        results = executor.map(lambda page: self._process_pdf_page(*page), batch)
+                        for (page_num, _), (page_text, blank_spaces) in zip(batch, results):
+                            all_extracted_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
+                            all_blank_spaces.extend(blank_spaces)
                 
-                self.extracted_text = '\n'.join(all_extracted_text)
-                self.blank_spaces = all_blank_spaces
+                extracted_text = '\n'.join(all_extracted_text)
+                blank_spaces = all_blank_spaces
             else:
                 # Process image file (single page)
                 image = cv2.imread(file_path)
@@ -421,91 +526,108 @@ class DocumentProcessor:
                 if image is None:
                     raise ValueError(f"Could not load image from {file_path}. Please ensure the file is a valid image or PDF format.")
                 
-                # Convert to grayscale
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                
-                # Apply OCR to extract text
-                self.extracted_text = pytesseract.image_to_string(gray)
-                
-                # Find blank spaces (white rectangles)
-                self.blank_spaces = self.find_blank_spaces(gray, 0)
-                
-                # If no blank spaces found, create virtual fields based on text analysis
-                if not self.blank_spaces:
-                    self.blank_spaces = self.create_virtual_fields_from_text(self.extracted_text, gray, 0)
+                return self.process_image_array(image)
             
             return {
-                'extracted_text': self.extracted_text,
-                'blank_spaces': self.blank_spaces,
-                'total_blanks': len(self.blank_spaces)
+                'extracted_text': extracted_text,
+                'blank_spaces': blank_spaces,
+                'total_blanks': len(blank_spaces)
             }
         except Exception as e:
             raise Exception(f"Error processing document: {str(e)}")
     
-    def find_blank_spaces(self, gray_image, page_num=0):
-        # Find blank spaces in the document
+    def process_image_array(self, image):
+        # Process a single-page image that is already decoded (e.g. with cv2.imdecode
+        # from uploaded bytes), so it does not have to be written out and read back
+        # Convert to grayscale
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        # Apply OCR to extract text
+        extracted_text = ocr_image(gray)
+        
+        # Find blank spaces (white rectangles)
+        blank_spaces = self.find_blank_spaces(gray, 0, extracted_text)
+        
+        # If no blank spaces found, create virtual fields based on text analysis
+        if not blank_spaces:
+            blank_spaces = self.create_virtual_fields_from_text(extracted_text, gray, 0)
+        
+        return {
+            'extracted_text': extracted_text,
+            'blank_spaces': blank_spaces,
+            'total_blanks': len(blank_spaces)
+        }
+    
+    def _contour_boxes(self, mask):
+        # Bounding boxes of a binary mask's external contours, as arrays x, y, w, h
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return np.array([cv2.boundingRect(contour) for contour in contours], dtype=np.int64).reshape(-1, 4).T
+    
+    def _blank_space_entries(self, gray_image, boxes, keep, page_num, extracted_text):
+        # Field records for the boxes selected by the boolean mask keep
+        x, y, w, h = boxes
+        
+        # The extracted text gives the same answer for every box, so it is read
+        # once here; boxes only fall back to OCR of their surroundings without it
+        text_field_type = field_type_from_text(extracted_text) if extracted_text else None
+        return [{
+            'x': int(x[i]),
+            'y': int(y[i]),
+            'width': int(w[i]),
+            'height': int(h[i]),
+            'area': int(w[i] * h[i]),
+            'context': text_field_type or analyze_context(gray_image, x[i], y[i], w[i], h[i]),
+            'page': page_num
+        } for i in np.flatnonzero(keep)]
+    
+    def find_blank_spaces(self, gray_image, page_num=0, extracted_text=""):
+        # Find blank spaces in the document; extracted_text, when given, is used to
+        # label them instead of OCR around each one
         try:
-            # Apply adaptive threshold for better edge detection
+            image_height, image_width = gray_image.shape
+            
+            # Apply adaptive threshold for better edge detection, then find contours
             thresh = cv2.adaptiveThreshold(gray_image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+            boxes = self._contour_boxes(thresh)
+            x, y, w, h = boxes
+            area = w * h
             
-            # Find contours
-            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # More specific filtering for form fields
+            # Look for rectangular areas that could be form fields
+            aspect_ratio = w / np.maximum(h, 1)
             
-            blank_spaces = []
-            image_height, image_width = gray_image.shape
+            # Filter for reasonable form field sizes and shapes
+            candidates = (
+                (area > 1000) & (area < 100000) &  # Larger minimum size to avoid artifacts
+                (w > 50) & (h > 20) &  # Larger minimum dimensions
+                (w < image_width * 0.8) & (h < image_height * 0.3) &  # Not too large
+                (aspect_ratio > 0.5) & (aspect_ratio < 10)  # Reasonable aspect ratio
+            )
             
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                area = w * h
-                
-                # More specific filtering for form fields
-                # Look for rectangular areas that could be form fields
-                aspect_ratio = w / h if h > 0 else 0
-                
-                # Filter for reasonable form field sizes and shapes
-                if (area > 1000 and area < 100000 and  # Larger minimum size to avoid artifacts
-                    w > 50 and h > 20 and  # Larger minimum dimensions
-                    w < image_width * 0.8 and h < image_height * 0.3 and  # Not too large
-                    (aspect_ratio > 0.5 and aspect_ratio < 10)):  # Reasonable aspect ratio
-                    
-                    # Check if this area is actually blank (mostly white)
-                    roi = gray_image[y:y+h, x:x+w]
-                    if roi.size > 0:
-                        mean_intensity = np.mean(roi)
-                        if mean_intensity > 200:  # Mostly white/blank area
-                            blank_spaces.append({
-                                'x': int(x),
-                                'y': int(y),
-                                'width': int(w),
-                                'height': int(h),
-                                'area': int(area),
-                                'context': analyze_context(gray_image, x, y, w, h, self.extracted_text),
-                                'page': page_num
-                            })
+            blank_spaces = []
+            if candidates.any():
+                # Check if each area is actually blank (mostly white): box means
+                # come from four corner lookups in the integral image
+                integral = cv2.integral(gray_image, sdepth=cv2.CV_64F)
+                box_sums = (integral[y + h, x + w] - integral[y, x + w]
+                            - integral[y + h, x] + integral[y, x])
+                blank = candidates & (box_sums > 200 * area)  # Mostly white/blank area
+                blank_spaces = self._blank_space_entries(gray_image, boxes, blank, page_num, extracted_text)
             
             # If no blank spaces found with the above method, try a simpler approach
             if not blank_spaces:
                 # Look for white rectangular regions
                 _, thresh_white = cv2.threshold(gray_image, 240, 255, cv2.THRESH_BINARY)
-                contours_white, _ = cv2.findContours(thresh_white, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                boxes = self._contour_boxes(thresh_white)
+                x, y, w, h = boxes
+                area = w * h
                 
-                for contour in contours_white:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    area = w * h
-                    
-                    if (area > 1000 and area < 50000 and
-                        w > 50 and h > 20 and
-                        w < image_width * 0.6 and h < image_height * 0.2):
-                        
-                        blank_spaces.append({
-                            'x': int(x),
-                            'y': int(y),
-                            'width': int(w),
-                            'height': int(h),
-                            'area': int(area),
-                            'context': analyze_context(gray_image, x, y, w, h, self.extracted_text),
-                            'page': page_num
-                        })
+                white = (
+                    (area > 1000) & (area < 50000) &
+                    (w > 50) & (h > 20) &
+                    (w < image_width * 0.6) & (h < image_height * 0.2)
+                )
+                blank_spaces = self._blank_space_entries(gray_image, boxes, white, page_num, extracted_text)
             
             return blank_spaces
             
@@ -515,86 +637,39 @@ class DocumentProcessor:
     
     def create_virtual_fields_from_text(self, text, gray_image, page_num=0):
         # Create virtual form fields based on text analysis
-        virtual_fields = []
-        lines = text.split('\n')
-        
-        # Enhanced form field patterns with more specific matching
-        field_patterns = {
-            'name': ['enter your name', 'please enter your name', 'name of dependent', 'full name'],
-            'age': ['age of dependent', 'age:', 'years old'],
-            'dropdown': ['select an item', 'dropdown', 'combo', 'choose'],
-            'checkbox': ['check all that apply', 'option 1', 'option 2', 'option 3'],
-            'email': ['email', 'e-mail', 'email address'],
-            'phone': ['phone', 'telephone', 'tel', 'mobile'],
-            'address': ['address', 'street', 'location'],
-            'date': ['date', 'birth', 'dob'],
-            'signature': ['signature', 'sign', 'initial']
-        }
-        
-        # Get image dimensions if available
-        if gray_image is not None:
-            height, width = gray_image.shape
-        else:
-            height, width = 800, 600  # Default dimensions
-        
-        # Create virtual fields based on text content
-        field_id = 0
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-            
-            # Skip empty lines
-            if not line_lower:
-                continue
-                
-            # Check if line contains form field indicators
-            field_type = None
-            for ftype, patterns in field_patterns.items():
-                for pattern in patterns:
-                    if pattern in line_lower:
-                        field_type = ftype
-                        break
-                if field_type:
-                    break
-            
-            # If we found a field type, create a virtual field
-            if field_type:
-                virtual_fields.append({
-                    'x': 50,  # Default position
-                    'y': 100 + (field_id * 60),  # Spread vertically with more space
-                    'width': 400,  # Wider default width
-                    'height': 40,   # Taller default height
-                    'area': 16000,   # Larger default area
-                    'context': field_type,
-                    'page': page_num
-                })
-                field_id += 1
+        # Find form field indicators in one pass over the text, keeping the
+        # highest-priority field type seen on each line
+        text_lower = text.lower()
+        line_starts = [0] + [match.end() for match in re.finditer('\n', text_lower)]
+        line_types = {}
+        for match in VIRTUAL_FIELD_RE.finditer(text_lower):
+            line = bisect_right(line_starts, match.start()) - 1
+            priority = VIRTUAL_FIELD_PRIORITY[match.lastgroup]
+            line_types[line] = min(line_types.get(line, priority), priority)
+        contexts = [VIRTUAL_FIELD_PATTERNS[line_types[line]][0] for line in sorted(line_types)]
         
         # If still no fields found, create some default ones based on common form elements
-        if not virtual_fields:
+        # (no line has an indicator at this point, so they are all general)
+        if not contexts:
             # Look for lines that end with colons (common in forms)
-            for i, line in enumerate(lines):
-                if line.strip().endswith(':') and len(line.strip()) > 3:
-                    field_type = 'general'
-                    line_lower = line.lower().strip()
-                    
-                    # Determine field type
-                    for ftype, patterns in field_patterns.items():
-                        for pattern in patterns:
-                            if pattern in line_lower:
-                                field_type = ftype
-                                break
-                    
-                    virtual_fields.append({
-                        'x': 50,
-                        'y': 100 + (len(virtual_fields) * 60),
-                        'width': 400,
-                        'height': 40,
-                        'area': 16000,
-                        'context': field_type,
-                        'page': page_num
-                    })
-        
-        return virtual_fields
+            contexts = [
+                'general' for line in text.split('\n')
+                if line.strip().endswith(':') and len(line.strip()) > 3
+            ]
+        
+        # Fields have no real position, so stack same-sized boxes down the page
+        return [
+            {
+                'x': 50,
+                'y': 100 + field_id * 60,
+                'width': 400,
+                'height': 40,
+                'area': 16000,
+                'context': context,
+                'page': page_num
+            }
+            for field_id, context in enumerate(contexts)
+        ]
     
     def process_word_document(self, file_path):
         # Process Word documents (.doc, .docx)
@@ -656,6 +731,11 @@ class DocumentProcessor:
         except Exception as e:
             raise Exception(f"Error processing text document: {str(e)}")
 
+@lru_cache(maxsize=1)
+def get_document_processor():
+    """Return the shared DocumentProcessor so uploads reuse its detectors"""
+    return DocumentProcessor()
+
 def index(request):
     # Main page view
     document = None
@@ -670,10 +750,12 @@ def index(request):
     
     # Check Ollama status
     try:
-        ollama = OllamaClient()
+        # Shares the short-lived status cache with the chat status endpoint
+        from chat.views import get_ollama_status
+        status_data = get_ollama_status()
         ollama_status = {
-            'running': ollama.is_ollama_running(),
-            'models': ollama.list_models() if ollama.is_ollama_running() else []
+            'running': status_data['running'],
+            'models': status_data['models']
         }
     except:
         pass
@@ -686,37 +768,27 @@ def index(request):
     
     return render(request, 'index.html', context)
 
+def field_type_from_text(full_text):
+    # Field type suggested by a document's extracted text, or None: the first line
+    # with a form field indicator decides, and the highest-priority type on that
+    # line wins, found with one search per type over the whole text
+    text_lower = full_text.lower()
+    best = None
+    for priority, (ftype, regex) in enumerate(CONTEXT_TEXT_PATTERNS):
+        match = regex.search(text_lower)
+        if match:
+            key = (text_lower.count('\n', 0, match.start()), priority)
+            if best is None or key < best[0]:
+                best = (key, ftype)
+    return best[1] if best else None
+
 def analyze_context(image, x, y, w, h, full_text=""):
     # Analyze context around blank space to suggest content
     # If we have the full extracted text, use it for better analysis
     if full_text:
-        lines = full_text.split('\n')
-        
-        # Look for form field indicators in the text
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-            
-            # Check for specific field types
-            if any(keyword in line_lower for keyword in ['enter your name', 'please enter your name', 'name:']):
-                return 'name'
-            elif any(keyword in line_lower for keyword in ['dependent', 'name of dependent']):
-                return 'name'
-            elif any(keyword in line_lower for keyword in ['age', 'age of dependent']):
-                return 'age'
-            elif any(keyword in line_lower for keyword in ['select', 'dropdown', 'combo']):
-                return 'dropdown'
-            elif any(keyword in line_lower for keyword in ['check', 'option']):
-                return 'checkbox'
-            elif any(keyword in line_lower for keyword in ['email', 'e-mail']):
-                return 'email'
-            elif any(keyword in line_lower for keyword in ['phone', 'telephone', 'tel']):
-                return 'phone'
-            elif any(keyword in line_lower for keyword in ['address']):
-                return 'address'
-            elif any(keyword in line_lower for keyword in ['date', 'birth']):
-                return 'date'
-            elif any(keyword in line_lower for keyword in ['signature', 'sign']):
-                return 'signature'
+        field_type = field_type_from_text(full_text)
+        if field_type:
+            return field_type
     
     # Fallback to OCR on context region
     try:
@@ -727,7 +799,7 @@ def analyze_context(image, x, y, w, h, full_text=""):
         x2 = min(image.shape[1], x + w + padding)
         
         context_region = image[y1:y2, x1:x2]
-        context_text = pytesseract.image_to_string(context_region)
+        context_text = ocr_image(context_region)
         context_lower = context_text.lower()
         
         if 'name' in context_lower:
@@ -843,7 +915,7 @@ def upload_fillable_pdf(request):
         
         # Store document ID in session
         if hasattr(request, 'session'):
-            request.session['current_document_id'] = str(doc_id)
+            request.session['current_document_id'] = doc_id
         
         print(f"Document ready for AI filling with {len(fields)} fields")
         
@@ -949,7 +1021,7 @@ def upload_document_with_sejda(request):
         
         # Store document ID in session
         if hasattr(request, 'session'):
-            request.session['current_document_id'] = str(doc_id)
+            request.session['current_document_id'] = doc_id
         
         print(f"Sejda integration created {len(fields)} form fields")
         
@@ -1115,9 +1187,10 @@ def upload_document(request):
         os.makedirs(upload_path, exist_ok=True)
         filepath = os.path.join(upload_path, filename)
         
-        with open(filepath, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
+        # Copy in 1 MiB blocks inside shutil rather than a Python loop over 64 KiB chunks
+        file.seek(0)
+        with open(filepath, 'wb') as destination:
+            shutil.copyfileobj(file, destination, length=1 << 20)
         
         # HTML-based PDF processing only
         if file_ext == '.pdf':
@@ -1174,7 +1247,7 @@ def upload_document(request):
             return Response({'error': 'Only PDF files are supported'}, status=400)
         
         # Process document based on file type
-        processor = DocumentProcessor()
+        processor = get_document_processor()
         
         # Process document using enhanced processor (fallback if Sejda not available)
         result = processor.process_document(filepath)
@@ -1193,7 +1266,7 @@ def upload_document(request):
         
         # Store document ID in session (if available)
         if hasattr(request, 'session'):
-            request.session['current_document_id'] = str(doc_id)
+            request.session['current_document_id'] = doc_id
         
         # For CLEAN Sejda workflow, we don't extract fields during upload
         # Fields will be detected and filled directly in Sejda when user clicks "AI Fill"
@@ -1361,7 +1434,7 @@ def upload_document(request):
                 
                 response_data = {
                     'success': True,
-                    'document_id': str(doc_id),
+                    'document_id': doc_id,
                     'document': document,
                     'pymupdf_converted': True,
                     'pymupdf_fillable_url': f"/media/{fillable_output}",  # Use actual PyMuPDF output
@@ -1385,7 +1458,7 @@ def upload_document(request):
         
         response_data = {
             'success': True,
-            'document_id': str(doc_id),
+            'document_id': doc_id,
             'document': document,
             'result': result
         }
@@ -1401,7 +1474,7 @@ def upload_document(request):
 
         response_data = {
             'success': True,
-            'document_id': str(doc_id),
+            'document_id': doc_id,
             'document': document,
             'result': {
                 'extracted_text': result['extracted_text'],
@@ -1440,12 +1513,10 @@ def update_field(request, doc_id):
             return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Find and update the field
-        for field in document['fields']:
-            if field['id'] == field_id:
-                field['user_content'] = content
-                break
-        else:
+        field = get_document_field(document, field_id)
+        if field is None:
             return Response({'error': 'Field not found'}, status=status.HTTP_404_NOT_FOUND)
+        field['user_content'] = content
         
         # Save to both persistent storage and memory
         save_document(document)
@@ -1486,8 +1557,8 @@ def delete_field(request, doc_id):
         if len(document['fields']) == original_count:
             return Response({'error': 'Field not found', 'searched_id': field_id, 'total_fields': original_count}, status=status.HTTP_404_NOT_FOUND)
         
-        # Update persistent storage
-        training_storage.save_document(str(doc_id), document)
+        # Save to both persistent storage and memory
+        save_document(document)
         
         return Response({
             'success': True, 
@@ -1502,17 +1573,18 @@ def delete_field(request, doc_id):
 @api_view(['POST'])
 def generate_pdf(request, doc_id):
     # Generate final PDF with filled content
+    doc_id = str(doc_id)
     try:
-        document = documents_storage.get(str(doc_id))
+        document = documents_storage.get(doc_id)
         if not document:
             # Fallback to persistent storage if not found in memory
             print(f"Document {doc_id} not found in memory storage, checking persistent storage...")
             try:
-                document = training_storage.load_document(str(doc_id))
+                document = training_storage.load_document(doc_id)
                 if document:
                     print(f"Document {doc_id} found in persistent storage")
                     # Cache in memory storage
-                    documents_storage[str(doc_id)] = document
+                    documents_storage[doc_id] = document
                 else:
                     print(f"Document {doc_id} not found in persistent storage either")
                     return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -1574,8 +1646,7 @@ def clear_session(request):
         if 'current_document_id' in request.session:
             doc_id = request.session['current_document_id']
             # Optionally remove the document from memory storage
-            if str(doc_id) in documents_storage:
-                del documents_storage[str(doc_id)]
+            documents_storage.pop(doc_id, None)
             del request.session['current_document_id']
         
         return Response({'success': True, 'message': 'Session cleared successfully'})
@@ -1586,6 +1657,7 @@ def clear_session(request):
 @api_view(['POST'])
 def manual_train(request, doc_id):
     # Manually trigger training from a document
+    doc_id = str(doc_id)
     try:
         print(f"Manual training request for document: {doc_id}")
         
@@ -1595,11 +1667,11 @@ def manual_train(request, doc_id):
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         # Try memory first, then persistent storage
-        document = documents_storage.get(str(doc_id))
+        document = documents_storage.get(doc_id)
         
         if not document:
             print(f"Document not found in memory, checking persistent storage: {doc_id}")
-            document = training_storage.load_document(str(doc_id))
+            document = training_storage.load_document(doc_id)
         
         if not document:
             print(f"Document not found in persistent storage either: {doc_id}")
@@ -1785,18 +1857,19 @@ def preview_document(request, doc_id):
 @api_view(['POST'])
 def regenerate_document(request, doc_id):
     # Regenerate the original document with filled fields overlaid
+    doc_id = str(doc_id)
     try:
         print(f"Regenerating document: {doc_id}")
         
-        document = documents_storage.get(str(doc_id))
+        document = documents_storage.get(doc_id)
         if not document:
             print(f"Document {doc_id} not found in memory storage, checking persistent storage...")
             try:
-                document = training_storage.load_document(str(doc_id))
+                document = training_storage.load_document(doc_id)
                 if document:
                     print(f"Document {doc_id} found in persistent storage")
                     # Cache in memory storage
-                    documents_storage[str(doc_id)] = document
+                    documents_storage[doc_id] = document
                 else:
                     print(f"Document {doc_id} not found in persistent storage either")
                     return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -1972,12 +2045,12 @@ def create_filled_pdf(input_path, output_path, fields):
         print(f"Processing {len(doc)} pages with {len(fields)} total fields")
         print(f"Fields by page: {[(p, len(f)) for p, f in fields_by_page.items()]}")
         
-        # Process each page (draw overlays for non-acro fields directly on original page)
-        for page_num in range(len(doc)):
+        # Process each page with fields (draw overlays for non-acro fields directly on original page)
+        for page_num, page_fields in sorted(fields_by_page.items()):
+            if not 0 <= page_num < len(doc):
+                continue
             page = doc[page_num]
 
-            # Get fields for this page
-            page_fields = fields_by_page.get(page_num, [])
             print(f"Page {page_num}: {len(page_fields)} fields to fill")
             
             # Add filled content to the fields for this page (only for non-AcroForm fields)
@@ -2066,12 +2139,12 @@ def create_filled_pdf(input_path, output_path, fields):
                     traceback.print_exc()
                     continue
         
-        # Save the updated document preserving interactive fields
+        # Save the updated document preserving interactive fields; the original
+        # pages' content streams are copied as they are rather than re-cleaned
         doc.save(
             output_path,
-            garbage=4,  # Maximum garbage collection
-            deflate=True,  # Compress
-            clean=True  # Clean up
+            garbage=3,  # Drop unused objects and merge duplicates
+            deflate=True  # Compress
         )
         doc.close()
         
@@ -2457,10 +2530,43 @@ def create_fillable_pdf(input_path, output_path, fields):
         traceback.print_exc()
         return False
 
+def _field_content_matcher(field_content_map):
+    """
+    Build a lookup from a line's lowercased text to the content of the first
+    field (in map order) whose context appears in it, or None. All contexts are
+    compiled into one lookahead alternation, so each line is scanned once
+    """
+    contents = {}
+    for context, content in field_content_map.items():
+        contents.setdefault(context.lower(), content)
+    if not contents:
+        return lambda text_lower: None
+    values = list(contents.values())
+    # At each position the alternation takes the earliest context in map order,
+    # so the lowest group seen over the line is the first context that occurs
+    pattern = re.compile('(?=(' + ')|('.join(map(re.escape, contents)) + '))')
+    
+    def match(text_lower):
+        first = None
+        for found in pattern.finditer(text_lower):
+            if first is None or found.lastindex < first:
+                first = found.lastindex
+                if first == 1:
+                    break
+        return None if first is None else values[first - 1]
+    return match
+
+def _is_fill_site(text):
+    """Whether a line is a label awaiting a value: it ends with ':', is blank, or has nothing after its first ':'"""
+    if ':' not in text:
+        return not text.strip()
+    return text.rstrip().endswith(':') or not text.split(':', 2)[1].strip()
+
 def create_filled_word(input_path, output_path, fields):
     # Create a filled Word document with filled content
     try:
         from docx import Document
+        from docx.table import _Cell
         
         # Open the original Word document
         doc = Document(input_path)
@@ -2489,42 +2595,31 @@ def create_filled_word(input_path, output_path, fields):
                 else:
                     field_content_map[context] = content
         
+        match_field_content = _field_content_matcher(field_content_map)
+        
+        def fill_paragraph(paragraph):
+            # Look for a field indicator and fill it in after the label; most
+            # paragraphs are not labels, so rule those out before lowercasing
+            text = paragraph.text
+            if not _is_fill_site(text):
+                return
+            content = match_field_content(text.lower().strip())
+            if content is not None:
+                # Append a run rather than resetting paragraph.text, which would
+                # rebuild the paragraph as one run and drop its formatting
+                paragraph.add_run(f" {content}")
+        
         # Process each paragraph to fill in the fields
         for paragraph in doc.paragraphs:
-            text = paragraph.text
-            text_lower = text.lower().strip()
-            
-            # Look for field indicators and fill them
-            for field_context, content in field_content_map.items():
-                if field_context.lower() in text_lower:
-                    # If the paragraph ends with ':' or is empty, add the content
-                    if text.strip().endswith(':') or text.strip() == '':
-                        paragraph.text = text + f" {content}"
-                        break
-                    # If there's a blank space after the field name, fill it
-                    elif ':' in text and len(text.split(':')[1].strip()) == 0:
-                        paragraph.text = text + f" {content}"
-                        break
-        
-        # Process tables as well
+            fill_paragraph(paragraph)
+        
+        # Process tables as well, walking each table's <w:tr>/<w:tc> elements
+        # directly: row.cells rebuilds the whole table's cell grid on every call
         for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text = paragraph.text
-                        text_lower = text.lower().strip()
-                        
-                        # Look for field indicators and fill them
-                        for field_type, content in field_content_map.items():
-                            if field_type in text_lower:
-                                # If the paragraph ends with ':' or is empty, add the content
-                                if text.strip().endswith(':') or text.strip() == '':
-                                    paragraph.text = text + f" {content}"
-                                    break
-                                # If there's a blank space after the field name, fill it
-                                elif ':' in text and len(text.split(':')[1].strip()) == 0:
-                                    paragraph.text = text + f" {content}"
-                                    break
+            for tr in table._tbl.tr_lst:
+                for tc in tr.tc_lst:
+                    for paragraph in _Cell(tc, table).paragraphs:
+                        fill_paragraph(paragraph)
         
         # Save the filled document
         doc.save(output_path)
@@ -2534,60 +2629,73 @@ def create_filled_word(input_path, output_path, fields):
         print(f"Error creating filled Word document: {e}")
         return False
 
+@lru_cache(maxsize=8)
+def _get_fill_font(size=14):
+    # TrueType font for text drawn onto filled images, loaded once per size
+    from PIL import ImageFont
+    for font_path in ("arial.ttf", "C:/Windows/Fonts/arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            continue
+    try:
+        # Pillow >= 10.1 ships a scalable default font
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
 def create_filled_image(input_path, output_path, fields):
     # Create a filled image with text overlaid on the original
     try:
         import cv2
         import numpy as np
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import Image, ImageDraw
         
         # Load the original image
         image = cv2.imread(input_path)
         if image is None:
             return False
         
-        # Convert to PIL Image for text drawing
+        # Try to load a font that matches the form
+        font = _get_fill_font(14)
+        background_alpha = 200  # Opacity (0-255) of the white box behind the text
+        
+        # The font's line height is the same for every value, so measure it once;
+        # only widths are measured per field
+        ascent, descent = font.getmetrics()
+        text_height = ascent + descent
+        
+        # Lay out every filled field at once: text starts a small margin in from
+        # the field's left edge and is vertically centered, with its background
+        # box one pixel around the line; whole-pixel coordinates, boxes clipped
+        # to the image
+        filled = [field for field in fields if field['user_content']]
+        geometry = np.array(
+            [(field['x_position'], field['y_position'], field['height']) for field in filled],
+            dtype=np.float64
+        ).reshape(-1, 3).astype(np.int32)
+        text_xs = geometry[:, 0] + 5
+        text_ys = geometry[:, 1] + (geometry[:, 2] - text_height) // 2
+        lefts = np.maximum(text_xs - 2, 0)
+        tops = np.maximum(text_ys - 1, 0)
+        bottoms = np.maximum(text_ys + text_height + 1, tops)
+        
+        # Draw a semi-transparent white background behind each value for
+        # readability, blending the box's pixels in place
+        # Don't cover the field with white - just add the text
+        # This preserves the original form appearance
+        text_widths = [int(font.getlength(field['user_content'])) for field in filled]
+        for text_x, text_width, left, top, bottom in zip(
+                text_xs.tolist(), text_widths, lefts.tolist(), tops.tolist(), bottoms.tolist()):
+            background = image[top:bottom, left:max(text_x + text_width + 2, left)]
+            np.multiply(background, 1 - background_alpha / 255, out=background, casting='unsafe')
+            np.add(background, background_alpha, out=background, casting='unsafe')
+        
+        # Draw the text with PIL, whose TrueType fonts cover non-Latin characters
         pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
         draw = ImageDraw.Draw(pil_image)
-        
-        # Try to load a font that matches the form
-        try:
-            # Try different font sizes to match the form
-            font = ImageFont.truetype("arial.ttf", 14)
-        except:
-            try:
-                font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", 14)
-            except:
-                font = ImageFont.load_default()
-        
-        # Overlay filled text on the fields
-        for field in fields:
-            if field['user_content']:
-                x = field['x_position']
-                y = field['y_position']
-                width = field['width']
-                height = field['height']
-                
-                # Don't cover the field with white - just add the text
-                # This preserves the original form appearance
-                text = field['user_content']
-                
-                # Calculate text position (left-aligned in the field)
-                text_bbox = draw.textbbox((0, 0), text, font=font)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_height = text_bbox[3] - text_bbox[1]
-                
-                # Position text in the field (left-aligned, vertically centered)
-                text_x = x + 5  # Small margin from left edge
-                text_y = y + (height - text_height) // 2
-                
-                # Draw the text with a slight background for readability
-                # Draw a semi-transparent background
-                bg_rect = [text_x - 2, text_y - 1, text_x + text_width + 2, text_y + text_height + 1]
-                draw.rectangle(bg_rect, fill=(255, 255, 255, 200))  # Semi-transparent white
-                
-                # Draw the text
-                draw.text((text_x, text_y), text, fill='black', font=font)
+        for field, text_x, text_y in zip(filled, text_xs.tolist(), text_ys.tolist()):
+            draw.text((text_x, text_y), field['user_content'], fill='black', font=font)
         
         # Save the result
         pil_image.save(output_path)
@@ -2600,43 +2708,29 @@ def create_filled_image(input_path, output_path, fields):
 def create_filled_text(input_path, output_path, fields):
     # Create a filled text file with filled content
     try:
-        with open(input_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        # Create a copy of the original content to preserve structure
-        filled_content = content
-        
-        # Replace blank lines or placeholder text with filled content
-        lines = filled_content.split('\n')
-        
         # Create a mapping of field types to their content
         field_content_map = {}
         for field in fields:
             if field['user_content']:
                 field_content_map[field['context']] = field['user_content']
         
-        # Process each line to fill in the fields
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-            
-            # Look for field indicators and fill them
-            for field_type, content in field_content_map.items():
-                if field_type in line_lower:
-                    # If the line ends with ':' or is empty, add the content
-                    if line.strip().endswith(':') or line.strip() == '':
-                        lines[i] = line + f" {content}"
-                        break
-                    # If there's a blank space after the field name, fill it
-                    elif ':' in line and len(line.split(':')[1].strip()) == 0:
-                        lines[i] = line + f" {content}"
-                        break
-        
-        # Join the lines back together
-        filled_content = '\n'.join(lines)
-        
-        # Save the filled content
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(filled_content)
+        match_field_content = _field_content_matcher(field_content_map)
+        
+        # Copy the file line by line, filling in fields as they pass through,
+        # so the whole text is never held in memory
+        with open(input_path, 'r', encoding='utf-8', errors='ignore') as source, \
+                open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as output:
+            for line in source:
+                text = line.rstrip('\n')
+                
+                # Look for a field indicator and fill it in after the label; most
+                # lines are not labels, so rule those out before lowercasing
+                if _is_fill_site(text):
+                    content = match_field_content(text.lower().strip())
+                    if content is not None:
+                        line = text + f" {content}" + line[len(text):]
+                
+                output.write(line)
         
         return True
         
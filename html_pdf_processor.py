@@ -1217,6 +1217,9 @@ class HTMLPDFProcessor:
         # IMPORTANT: Global field counter that persists across all lines!
         self._field_counter = {'underscore': 0, 'dotted': 0, 'bracket': 0, 'blank': 0}
         
+        # Index fields by id once so each visual indicator is a dict lookup
+        fields_by_id = {field.id: field for field in fields}
+        
         # Process the text and embed fields naturally within the existing text structure
         lines = text.split('\n')
         
@@ -1272,7 +1275,7 @@ class HTMLPDFProcessor:
             
             if not field_added:
                 # Check if this line contains visual field indicators that should be converted
-                converted_line = self._convert_visual_indicators_to_inputs(line, fields)
+                converted_line = self._convert_visual_indicators_to_inputs(line, fields, fields_by_id)
                 
                 # Apply styling based on line type
                 if is_centered:
@@ -1301,9 +1304,12 @@ class HTMLPDFProcessor:
         
         return html_content
     
-    def _convert_visual_indicators_to_inputs(self, line: str, fields: List[Field]) -> str:
+    def _convert_visual_indicators_to_inputs(self, line: str, fields: List[Field],
+                                             fields_by_id: Optional[Dict[str, Field]] = None) -> str:
         """Convert visual field indicators in a line to input fields"""
         converted_line = line
+        if fields_by_id is None:
+            fields_by_id = {field.id: field for field in fields}
         
         # Use the global field counter (set in _convert_text_to_html_with_fields)
         if not hasattr(self, '_field_counter'):
@@ -1316,7 +1322,7 @@ class HTMLPDFProcessor:
             for match in matches:
                 # Find the next available underscore field using global counter
                 field_id = f"underscore_{self._field_counter['underscore']}"
-                field = next((f for f in fields if f.id == field_id), None)
+                field = fields_by_id.get(field_id)
                 
                 if field:
                     placeholder = field.placeholder
@@ -1337,7 +1343,7 @@ class HTMLPDFProcessor:
             for match in matches:
                 # Find the next available dotted field using global counter
                 field_id = f"dotted_{self._field_counter['dotted']}"
-                field = next((f for f in fields if f.id == field_id), None)
+                field = fields_by_id.get(field_id)
                 
                 if field:
                     placeholder = field.placeholder
@@ -1357,7 +1363,7 @@ class HTMLPDFProcessor:
             for match in matches:
                 # Find the next available bracket field using global counter
                 field_id = f"bracket_{self._field_counter['bracket']}"
-                field = next((f for f in fields if f.id == field_id), None)
+                field = fields_by_id.get(field_id)
                 
                 if field:
                     placeholder = field.placeholder
@@ -1924,6 +1930,16 @@ class HTMLPDFProcessor:
             raise
 
 
+def extract_layout_and_html(pdf_path: str):
+    """
+    Extract a PDF's layout and build its HTML template in one call; module-level
+    so it can run in a worker process
+    """
+    processor = HTMLPDFProcessor()
+    layout = processor.extract_pdf_layout(pdf_path)
+    return layout, processor.create_html_template(layout)
+
+
 def test_html_processor():
     """Test the HTML PDF processor"""
     processor = HTMLPDFProcessor()
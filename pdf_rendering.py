@@ -0,0 +1,19 @@
+"""
+PDF page rendering helpers
+
+Shared by the document processors that run OpenCV on rendered PDF pages:
+renders a page with PyMuPDF and hands back the pixels as a NumPy image.
+"""
+
+import fitz  # PyMuPDF
+import numpy as np
+
+
+def render_page_gray(page: fitz.Page, zoom: float) -> np.ndarray:
+    """Render a PDF page at the given zoom as a grayscale OpenCV image"""
+    # Render straight to grayscale, which is all the processors' detection uses
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+
+    # Wrap the raw samples as an OpenCV image (no PNG encode/decode round
+    # trip); the bytearray is a writable copy that outlives the pixmap
+    return np.frombuffer(bytearray(pix.samples_mv), np.uint8).reshape(pix.height, pix.width)
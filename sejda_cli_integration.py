@@ -9,13 +9,14 @@ Requirements:
 - sejda-console CLI accessible from command line
 """
 
-import os
+import shutil
 import subprocess
 import tempfile
 import logging
 from pathlib import Path
 from typing import Optional, Dict, List
 import fitz  # PyMuPDF
+from sejda_paths import first_existing_path, load_cached_sejda_path, save_cached_sejda_path
 
 logger = logging.getLogger(__name__)
 
@@ -47,21 +48,30 @@ class SejdaDesktopCLI:
             "./sejda-console.exe"
         ]
         
-        # First, try to find it in PATH
-        try:
-            result = subprocess.run(['sejda-console', '--version'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                logger.info("Found sejda-console in PATH")
-                return 'sejda-console'
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            pass
+        # Reuse the location found by an earlier run
+        cached_path = load_cached_sejda_path()
+        if cached_path:
+            logger.info(f"Using cached sejda-console path: {cached_path}")
+            return cached_path
+        
+        # First, try to find it in PATH (only run it when it is actually there)
+        if shutil.which('sejda-console'):
+            try:
+                result = subprocess.run(['sejda-console', '--version'], 
+                                      capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    logger.info("Found sejda-console in PATH")
+                    save_cached_sejda_path('sejda-console')
+                    return 'sejda-console'
+            except (FileNotFoundError, subprocess.TimeoutExpired):
+                pass
         
         # Then check common paths
-        for path in common_paths:
-            if os.path.exists(path):
-                logger.info(f"Found sejda-console at: {path}")
-                return path
+        path = first_existing_path(common_paths)
+        if path:
+            logger.info(f"Found sejda-console at: {path}")
+            save_cached_sejda_path(path)
+            return path
         
         logger.warning("Sejda Console not found in common locations")
         return None
@@ -0,0 +1,45 @@
+"""
+Sejda console location helpers
+
+Shared by the Sejda CLI integration and the installation checker: probes the
+common install paths concurrently and remembers the result between runs.
+"""
+
+import os
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Where the resolved sejda-console location is remembered between runs
+SEJDA_PATH_CACHE = Path.home() / '.ai_autofill' / 'sejda_path'
+
+
+def load_cached_sejda_path() -> Optional[str]:
+    """Return the remembered sejda-console location if it is still valid"""
+    try:
+        path = SEJDA_PATH_CACHE.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    if path and (os.path.exists(path) or shutil.which(path)):
+        return path
+    return None
+
+
+def save_cached_sejda_path(path: str) -> None:
+    """Remember the sejda-console location so later runs skip probing"""
+    try:
+        SEJDA_PATH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        SEJDA_PATH_CACHE.write_text(path, encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Could not cache Sejda path: {e}")
+
+
+def first_existing_path(paths: List[str]) -> Optional[str]:
+    """Return the first path that exists, checking them all concurrently"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        exists = list(executor.map(os.path.exists, paths))
+    return next((path for path, found in zip(paths, exists) if found), None)
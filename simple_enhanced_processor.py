@@ -65,7 +65,8 @@ class SimpleEnhancedProcessor:
             
             # Process each page
             for page_num, image in images:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                # Pages are rendered in grayscale already
+                gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
                 page_text = pytesseract.image_to_string(gray)
                 extracted_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
                 
@@ -90,18 +91,14 @@ class SimpleEnhancedProcessor:
         """Convert all PDF pages to images using PyMuPDF"""
         try:
             import fitz
+            from pdf_rendering import render_page_gray
             pdf_document = fitz.open(pdf_path)
             images = []
             
             # Convert each page
             for page_num in range(len(pdf_document)):
                 page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
-                img_data = pix.tobytes("png")
-                
-                # Convert to OpenCV format
-                nparr = np.frombuffer(img_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                image = render_page_gray(page, 2.0)
                 images.append((page_num, image))
             
             pdf_document.close()
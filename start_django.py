@@ -24,6 +24,8 @@ def setup_django():
     """Setup Django environment"""
     print("Setting up Django environment...")
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_autofill_project.settings')
+    # This launcher starts the server, so load the model while Django starts up
+    os.environ.setdefault('OLLAMA_PRELOAD', 'true')
     django.setup()
     print("Django environment ready")
 
@@ -24,6 +24,8 @@ import joblib
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from pdf_rendering import render_page_gray
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -324,13 +326,17 @@ class UniversalDocumentProcessor:
         
         return "unknown", 0.0
     
-    def detect_fields_universal(self, file_path: str) -> List[DocumentField]:
+    def detect_fields_universal(self, file_path: str, text: Optional[str] = None) -> List[DocumentField]:
         """
         Universal field detection that works for any document type
+        
+        Pass ``text`` when the document's text has already been extracted to
+        skip extracting (or OCR-ing) it again.
         """
         try:
             # Determine document type
-            text = self._extract_text(file_path)
+            if text is None:
+                text = self._extract_text(file_path)
             doc_type, confidence = self.classify_document_type(text)
             
             logger.info(f"Detected document type: {doc_type} (confidence: {confidence:.2f})")
@@ -453,13 +459,7 @@ class UniversalDocumentProcessor:
             doc = fitz.open(pdf_path)
             for page_num in range(len(doc)):
                 page = doc[page_num]
-                mat = fitz.Matrix(2.0, 2.0)  # 2x scale
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Convert to OpenCV image
-                nparr = np.frombuffer(img_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                image = render_page_gray(page, 2.0)  # 2x scale
                 images.append((page_num, image))
             
             doc.close()
@@ -472,7 +472,7 @@ class UniversalDocumentProcessor:
         """Detect rectangular form fields"""
         fields = []
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # Multiple thresholding approaches
             thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
@@ -480,33 +480,41 @@ class UniversalDocumentProcessor:
             # Find contours
             contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            for i, contour in enumerate(contours):
-                x, y, w, h = cv2.boundingRect(contour)
+            if contours:
+                x, y, w, h = np.array([cv2.boundingRect(contour) for contour in contours]).T
                 
                 # Filter by size and aspect ratio
-                if 50 <= w <= 400 and 15 <= h <= 50:
-                    # Check if area is blank
-                    roi = gray[y:y+h, x:x+w]
-                    if roi.size > 0:
-                        mean_intensity = np.mean(roi)
-                        std_intensity = np.std(roi)
-                        dark_pixels = np.sum(roi < 100)
-                        dark_ratio = dark_pixels / roi.size
-                        
-                        if mean_intensity > 200 and std_intensity < 40 and dark_ratio < 0.1:
-                            field = DocumentField(
-                                id=f"rect_p{page_num}_{i}",
-                                field_type="text",
-                                x_position=x,
-                                y_position=y,
-                                width=w,
-                                height=h,
-                                page_number=page_num,
-                                context="rectangular field",
-                                confidence=0.8,
-                                detection_method="visual_rectangular"
-                            )
-                            fields.append(field)
+                candidates = (w >= 50) & (w <= 400) & (h >= 15) & (h <= 50)
+                
+                # Check if each area is blank. Box statistics come from corner lookups
+                # in integral images instead of a pass over every ROI: pixel sums and
+                # squared sums give mean and std, a 1-bit dark mask gives the dark count
+                sums, squared_sums = cv2.integral2(gray, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+                dark_counts = cv2.integral((gray < 100).view(np.uint8))
+                
+                def box_totals(integral):
+                    return integral[y + h, x + w] - integral[y, x + w] - integral[y + h, x] + integral[y, x]
+                
+                pixels = np.maximum(w * h, 1)
+                mean_intensity = box_totals(sums) / pixels
+                std_intensity = np.sqrt(np.maximum(box_totals(squared_sums) / pixels - mean_intensity ** 2, 0))
+                dark_ratio = box_totals(dark_counts) / pixels
+                
+                blank = candidates & (mean_intensity > 200) & (std_intensity < 40) & (dark_ratio < 0.1)
+                for i in np.flatnonzero(blank):
+                    field = DocumentField(
+                        id=f"rect_p{page_num}_{i}",
+                        field_type="text",
+                        x_position=int(x[i]),
+                        y_position=int(y[i]),
+                        width=int(w[i]),
+                        height=int(h[i]),
+                        page_number=page_num,
+                        context="rectangular field",
+                        confidence=0.8,
+                        detection_method="visual_rectangular"
+                    )
+                    fields.append(field)
         
         except Exception as e:
             logger.error(f"Error detecting rectangular fields: {e}")
@@ -517,7 +525,7 @@ class UniversalDocumentProcessor:
         """Detect fields with underlines"""
         fields = []
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # Detect horizontal lines
             edges = cv2.Canny(gray, 50, 150)
@@ -560,7 +568,7 @@ class UniversalDocumentProcessor:
         """Detect checkbox fields"""
         fields = []
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # Detect small square shapes
             thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)